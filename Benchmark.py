@@ -0,0 +1,240 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from Generator import Generator
+from Statistics import DataSet, Metrics, Report, Table
+
+prof_name = 'Программист'
+query = ('Название региона: Москва', 'Оклад', 'Да', '1 100', '')
+recent = 'Дата публикации вакансии: 01.01.2022 - 31.12.2022'
+
+
+def parser_case(f_name, folder):
+    """Разбор всего файла в список словарей
+
+    Args:
+        f_name (str): Название файла
+        folder (str): Папка для файлов отчётов
+
+    Returns:
+        Функция, выполняющая замеряемую работу и возвращающая её объём
+    """
+    return lambda: len(DataSet.CSV_parser(f_name))
+
+
+def refactor_case(f_name, folder):
+    """Форматирование описаний вакансий через strRefactor
+
+    Args:
+        f_name (str): Название файла
+        folder (str): Папка для файлов отчётов
+
+    Returns:
+        Функция, выполняющая замеряемую работу и возвращающая её объём
+    """
+    texts = [row['description'] for row in DataSet.CSV_reader(f_name) if 'description' in row]
+
+    def run():
+        for text in texts:
+            DataSet.strRefactor(text)
+        return sum(len(text) for text in texts)
+    return run
+
+
+def make_case(mode, cache=False, where=None):
+    """Создаёт замер DataSet.make в заданном режиме, время включает загрузку файла
+
+    Args:
+        mode (str): Режим загрузки DataSet
+        cache (bool): Использовать ли кэш разобранного файла (кэш создаётся до замера)
+        where (str): Фильтр вакансий для режима 'partitioned' (части файла создаются до замера)
+
+    Returns:
+        Функция подготовки замера
+    """
+    def setup(f_name, folder):
+        if cache:
+            DataSet.load_columns(f_name)
+        if mode == 'cube':
+            DataSet.load_cube(f_name, [prof_name])
+        if mode == 'partitioned':
+            DataSet.load_partitions(f_name)
+
+        def run():
+            data_set = DataSet(f_name, mode, cache=cache, query=where)
+            data_set.make(prof_name)
+            return data_set.vac_amount
+        return run
+    return setup
+
+
+def table_case(index, mode='list'):
+    """Создаёт замер фильтрации, сортировки и форматирования таблицы по уже загруженным вакансиям
+
+    Args:
+        index (bool): Построить ли индексы до замера
+        mode (str): Режим загрузки DataSet ('list' или 'mmap')
+
+    Returns:
+        Функция подготовки замера
+    """
+    def setup(f_name, folder):
+        data_set = DataSet(f_name, mode, cache=False)
+        if index:
+            data_set.make_index()
+
+        def run():
+            table = Table(f_name, query=query, data_set=data_set)
+            for _ in table.pages():
+                pass
+            return len(data_set.vacancies_objects)
+        return run
+    return setup
+
+
+def report_case(method):
+    """Создаёт замер одного из методов Report.generate_*, статистика считается до замера
+
+    Args:
+        method (str): Название метода
+
+    Returns:
+        Функция подготовки замера
+    """
+    def setup(f_name, folder):
+        report = Report(f_name, prof_name, folder=os.path.join(folder, 'report'))
+        os.makedirs(report.folder, exist_ok=True)
+        if method == 'generate_pdf':
+            report.generate_image()
+
+        def run():
+            getattr(report, method)()
+            return 1
+        return run
+    return setup
+
+
+cases = {
+    'CSV_parser': (parser_case, 'строк'),
+    'strRefactor': (refactor_case, 'символов'),
+    'make_list': (make_case('list'), 'строк'),
+    'make_stream': (make_case('stream'), 'строк'),
+    'make_parallel': (make_case('parallel'), 'строк'),
+    'make_columns': (make_case('columns'), 'строк'),
+    'make_columns_cache': (make_case('columns', True), 'строк'),
+    'make_cube': (make_case('cube'), 'строк'),
+    'make_partitioned': (make_case('partitioned'), 'строк'),
+    'make_partitioned_recent': (make_case('partitioned', where=recent), 'строк'),
+    'Table': (table_case(False), 'строк'),
+    'Table_index': (table_case(True), 'строк'),
+    'Table_mmap': (table_case(False, 'mmap'), 'строк'),
+    'Table_mmap_index': (table_case(True, 'mmap'), 'строк'),
+    'generate_image': (report_case('generate_image'), 'файлов'),
+    'generate_excel': (report_case('generate_excel'), 'файлов'),
+    'generate_pdf': (report_case('generate_pdf'), 'файлов')
+}
+
+
+def measure(args):
+    """Выполняет один замер, вызывается в отдельном процессе, чтобы память замеров не смешивалась
+
+    Args:
+        args (tuple): Название замера, название файла, папка для файлов отчётов и количество повторов
+
+    Returns:
+        dict: Лучшее время, объём работы, единица объёма и наибольший объём памяти или текст ошибки
+    """
+    name, f_name, folder, repeat = args
+    setup, unit = cases[name]
+    try:
+        run = setup(f_name, folder)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            amount = run()
+            times.append(time.perf_counter() - start)
+    except Exception as error:
+        message = str(error).splitlines()
+        return {'error': ': '.join([type(error).__name__] + message[:1])}
+    return {'seconds': min(times), 'amount': amount, 'unit': unit, 'memory': Metrics.peak_memory()}
+
+
+def format_result(result, old=None):
+    """Форматирует результат замера в строку отчёта
+
+    Args:
+        result (dict): Результат замера
+        old (dict): Результат того же замера из сохранённого отчёта для сравнения
+
+    Returns:
+        str: Строка отчёта
+    """
+    line = f'{result["rows"]:>9} {result["case"]:<24}'
+    if 'error' in result:
+        return f'{line} пропущен: {result["error"]}'
+    line += f' {result["seconds"]:>9.4f} с {result["amount"] / result["seconds"]:>12.0f} {result["unit"]}/с'
+    if result['memory'] is not None:
+        line += f' {result["memory"] / 2 ** 20:>8.1f} МБ'
+    if old and 'seconds' in old:
+        line += f'  x{old["seconds"] / result["seconds"]:.2f}'
+    return line
+
+
+def benchmark(sizes, names, folder, repeat=3, seed=0, previous=()):
+    """Генерирует файлы заданных размеров и выполняет замеры для каждого из них
+
+    Args:
+        sizes (list): Количество вакансий в файлах
+        names (list): Названия замеров
+        folder (str): Папка для сгенерированных файлов, уже созданные файлы используются повторно
+        repeat (int): Количество повторов, в отчёт попадает лучшее время
+        seed (int): Начальное значение генератора
+        previous (list): Результаты прошлого запуска для сравнения
+
+    Returns:
+        list: Результаты замеров
+    """
+    previous = {(x['rows'], x['case']): x for x in previous}
+    results = []
+    for rows in sizes:
+        f_name = os.path.join(folder, f'vacancies_{rows}_{seed}.csv')
+        if not os.path.exists(f_name):
+            Generator(seed).write(f_name, rows)
+        for name in names:
+            with ProcessPoolExecutor(1) as pool:
+                result = pool.submit(measure, (name, f_name, folder, repeat)).result()
+            result.update(rows=rows, case=name)
+            print(format_result(result, previous.get((rows, name))), flush=True)
+            results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замеры скорости и памяти загрузки данных и создания отчётов')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Размеры файлов')
+    parser.add_argument('--cases', nargs='+', default=list(cases), choices=list(cases), help='Замеры')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+    parser.add_argument('--folder', help='Папка для сгенерированных файлов, по умолчанию - временная папка')
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    parser.add_argument('--compare', help='Файл с результатами прошлого запуска для сравнения')
+    args = parser.parse_args()
+    previous = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            previous = json.load(file)
+    folder = args.folder or tempfile.mkdtemp()
+    os.makedirs(folder, exist_ok=True)
+    try:
+        results = benchmark(args.sizes, args.cases, folder, args.repeat, args.seed, previous)
+    finally:
+        if not args.folder:
+            shutil.rmtree(folder, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=1)
@@ -0,0 +1,237 @@
+import argparse
+import csv
+from itertools import accumulate
+import random
+
+from Statistics import currency_to_rub, experience
+
+titles = ['name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name', 'salary_from',
+          'salary_to', 'salary_gross', 'salary_currency', 'area_name', 'published_at']
+short_titles = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+professions = {
+    'Программист': 120000,
+    'Python разработчик': 150000,
+    'Java программист': 160000,
+    'Программист 1С': 110000,
+    'Frontend разработчик': 130000,
+    'Аналитик': 100000,
+    'Системный аналитик': 140000,
+    'Тестировщик': 80000,
+    'DevOps инженер': 180000,
+    'Менеджер по продажам': 60000,
+    'Бухгалтер': 55000,
+    'Дизайнер': 70000,
+    'Оператор call-центра': 35000,
+    'Водитель': 50000,
+    'Продавец-консультант': 35000
+}
+grades = ['', '', '', 'Младший ', 'Старший ', 'Ведущий ', 'Junior ', 'Senior ']
+cities = {
+    'Москва': 30,
+    'Санкт-Петербург': 12,
+    'Новосибирск': 4,
+    'Екатеринбург': 4,
+    'Казань': 3,
+    'Нижний Новгород': 3,
+    'Краснодар': 3,
+    'Самара': 2,
+    'Уфа': 2,
+    'Пермь': 2,
+    'Воронеж': 2,
+    'Алматы': 2,
+    'Минск': 2,
+    'Киев': 2,
+    'Ташкент': 1,
+    'Баку': 1,
+    'Тбилиси': 1,
+    'Бишкек': 1
+}
+currencies = {
+    'RUR': 85,
+    'USD': 4,
+    'EUR': 2,
+    'KZT': 3,
+    'UAH': 2,
+    'BYR': 2,
+    'UZS': 1,
+    'AZN': 0.5,
+    'GEL': 0.3,
+    'KGS': 0.2
+}
+skills = ['Python', 'SQL', 'Git', 'Linux', 'Java', 'JavaScript', 'HTML', 'CSS', 'Docker', 'Kubernetes', '1С',
+          'Excel', 'Английский язык', 'Деловая переписка', 'Работа в команде', 'PostgreSQL', 'Django', 'React',
+          'Аналитическое мышление', 'Грамотная речь', 'Ведение переговоров', 'Управление проектами']
+phrases = ['Мы ищем', 'в нашу команду', 'крупная компания', 'стабильная заработная плата',
+           'официальное трудоустройство', 'по ТК РФ', 'дружный коллектив', 'гибкий график',
+           'возможность удалённой работы', 'обучение за счёт компании', 'разработка и поддержка', 'участие в проектах',
+           'опыт работы', 'знание', 'умение работать', 'ответственность', 'ДМС', 'современный офис', 'карьерный рост',
+           'премии по результатам работы']
+sections = ['Обязанности:', 'Требования:', 'Условия:', 'Мы предлагаем:', 'О компании:']
+
+
+class Generator:
+    """Класс для генерации синтетических csv файлов вакансий с теми же столбцами, что и выгрузка.
+    При одинаковых параметрах создаётся один и тот же файл. Описания, как и в настоящей выгрузке,
+    повторяются: они выбираются из заранее созданного набора
+
+    Attributes:
+        random (random.Random): Генератор случайных чисел
+        short (bool): Создавать ли файл только из столбцов, нужных для статистики
+        broken (float): Доля строк с пустыми значениями или неполных строк, которые читатель должен отбросить
+        titles (list): Названия столбцов
+        weights (dict): Значения и накопленные веса для professions, cities и currencies
+        descriptions (dict): Наборы описаний для каждой профессии
+    """
+
+    def __init__(self, seed=0, short=False, broken=0.01, descriptions=50):
+        """Инициализирует объект Generator
+
+        Args:
+            seed (int): Начальное значение генератора случайных чисел
+            short (bool): Создавать ли файл только из столбцов, нужных для статистики
+            broken (float): Доля некорректных строк
+            descriptions (int): Количество различных описаний для каждой профессии
+        """
+        self.random = random.Random(seed)
+        self.short = short
+        self.broken = broken
+        self.titles = short_titles if short else titles
+        self.weights = {name: (list(x), list(accumulate(x.values())))
+                        for name, x in (('professions', professions), ('cities', cities), ('currencies', currencies))}
+        self.descriptions = {} if short else \
+            {name: [self.make_description(name) for _ in range(descriptions)] for name in professions}
+
+    def choice(self, name):
+        """Выбирает значение словаря весов с вероятностью, пропорциональной его весу
+
+        Args:
+            name (str): Название словаря весов ('professions', 'cities' или 'currencies')
+
+        Returns:
+            str: Выбранное значение
+        """
+        values, cum_weights = self.weights[name]
+        return self.random.choices(values, cum_weights=cum_weights)[0]
+
+    def make_description(self, name):
+        """Создаёт описание вакансии с HTML тегами, переносами строк и лишними пробелами
+
+        Args:
+            name (str): Название вакансии
+
+        Returns:
+            str: Описание
+        """
+        parts = [f'<p><strong>{name}</strong></p>']
+        for section in self.random.sample(sections, self.random.randint(2, len(sections))):
+            items = ''.join(f'<li>{" ".join(self.random.sample(phrases, self.random.randint(2, 6)))}</li>\n'
+                            for _ in range(self.random.randint(2, 7)))
+            parts.append(f'<p><strong>{section}</strong></p>\n<ul>\n{items}</ul>')
+        if self.random.random() < 0.3:
+            parts.append(f'<p>  {"  ".join(self.random.sample(phrases, 4))} </p>')
+        return '\n'.join(parts)
+
+    def make_salary(self, base, currency):
+        """Создаёт вилку оклада в заданной валюте
+
+        Args:
+            base (int): Средняя зарплата профессии в рублях
+            currency (str): Валюта оклада
+
+        Returns:
+            tuple: Нижняя и верхняя границы вилки оклада
+        """
+        salary = base * self.random.lognormvariate(0, 0.45) / currency_to_rub[currency]
+        step = 10 ** max(len(str(int(salary))) - 2, 0)
+        salary_from = round(salary * self.random.uniform(0.7, 1) / step) * step
+        salary_to = round(salary * self.random.uniform(1, 1.5) / step) * step
+        return float(salary_from), float(max(salary_to, salary_from))
+
+    def make_date(self):
+        """Создаёт дату публикации, количество вакансий растёт от года к году
+
+        Returns:
+            str: Дата публикации в формате выгрузки
+        """
+        year = 2022 - min(int(self.random.expovariate(0.25)), 19)
+        day = self.random.randrange(12 * 28)
+        minutes, seconds = divmod(self.random.randrange(24 * 60 * 60), 60)
+        return f'{year}-{day // 28 + 1:02}-{day % 28 + 1:02}T{minutes // 60:02}:{minutes % 60:02}:{seconds:02}+0300'
+
+    def row(self):
+        """Создаёт строку файла
+
+        Returns:
+            list: Значения столбцов
+        """
+        profession = self.choice('professions')
+        name = f'{self.random.choice(grades)}{profession}'
+        currency = self.choice('currencies')
+        salary_from, salary_to = self.make_salary(professions[profession], currency)
+        if self.short:
+            row = [name, str(salary_from), str(salary_to), currency, self.make_city(), self.make_date()]
+            return self.make_broken(row)
+        values = {
+            'name': name,
+            'description': self.random.choice(self.descriptions[profession]),
+            'key_skills': '\n'.join(self.random.sample(skills, self.random.randint(1, 8))),
+            'experience_id': self.random.choice(list(experience)),
+            'premium': self.random.choice(['True', 'False', 'False', 'False']),
+            'employer_name': f'Компания {self.random.randint(1, 2000)}',
+            'salary_from': str(salary_from),
+            'salary_to': str(salary_to),
+            'salary_gross': self.random.choice(['True', 'False']),
+            'salary_currency': currency,
+            'area_name': self.make_city(),
+            'published_at': self.make_date()
+        }
+        row = [values[title] for title in self.titles]
+        return self.make_broken(row)
+
+    def make_city(self):
+        """Выбирает город, небольшая часть вакансий приходится на множество мелких городов
+
+        Returns:
+            str: Название города
+        """
+        return self.choice('cities') if self.random.random() < 0.97 else f'Город {self.random.randint(1, 300)}'
+
+    def make_broken(self, row):
+        """С вероятностью broken портит строку: очищает одно значение или обрезает строку
+
+        Args:
+            row (list): Значения столбцов
+
+        Returns:
+            list: Строка файла
+        """
+        if self.random.random() < self.broken:
+            if self.random.random() < 0.5:
+                row[self.random.randrange(len(row))] = ''
+            else:
+                row = row[:self.random.randrange(1, len(row))]
+        return row
+
+    def write(self, path, rows):
+        """Записывает csv файл в той же кодировке, что и выгрузка
+
+        Args:
+            path (str): Путь к файлу
+            rows (int): Количество строк вакансий
+        """
+        with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.titles)
+            for _ in range(rows):
+                writer.writerow(self.row())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Генерация синтетического csv файла вакансий')
+    parser.add_argument('path', help='Путь к создаваемому файлу')
+    parser.add_argument('rows', type=int, help='Количество вакансий')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    parser.add_argument('--short', action='store_true', help='Только столбцы, нужные для статистики')
+    parser.add_argument('--broken', type=float, default=0.01, help='Доля некорректных строк')
+    args = parser.parse_args()
+    Generator(args.seed, args.short, args.broken).write(args.path, args.rows)
@@ -1,13 +1,23 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
 import csv
-import matplotlib.pyplot as plt
-import numpy as np
-import openpyxl
-from openpyxl.styles import Font, Border, Side
-import pdfkit
-from jinja2 import Environment, FileSystemLoader
-import prettytable
-from prettytable import PrettyTable
+import hashlib
+import heapq
+import io
+from itertools import accumulate, chain, islice, zip_longest
+import json
+import mmap
+import os
+from pathlib import Path
+import shutil
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+import copy
 import re
+from urllib.parse import parse_qs, urlparse
 
 testStr = 'Ветка main'
 
@@ -51,6 +61,63 @@ currency_to_rub = {
     "USD": 60.66,
     "UZS": 0.0055,
 }
+lazy_columns = ('description', 'key_skills')
+plain_columns = ('salary_from', 'salary_to', 'salary_gross', 'salary_currency', 'published_at', 'experience_id',
+                 'premium')
+html_tags = re.compile(r"<[^>]*>")
+cache_version = 3
+state_version = 3
+cube_version = 3
+rows_version = 2
+parts_version = 1
+quantiles = (0.1, 0.5, 0.9)
+sketch_size = 200
+offsets_chunk = 65536
+
+
+def parse_date(published_at):
+    """Переводит дату публикации в число вида ГГГГММДДччммсс, такие числа сравниваются в порядке дат,
+    а год, месяц и день получаются целочисленным делением
+
+    Args:
+        published_at (str): Дата публикации в формате ГГГГ-ММ-ДДTчч:мм:сс
+
+    Returns:
+        int: Дата публикации числом
+    """
+    s = published_at
+    return int(f'{s[:4]}{s[5:7]}{s[8:10]}{s[11:13]}{s[14:16]}{s[17:19]}'.ljust(14, '0'))
+
+
+def replace_folder(source, target):
+    """Заменяет папку target готовой папкой source. Файлы старой папки не перезаписываются, а удаляются
+    после замены, поэтому уже отображённые в память файлы остаются доступны тем, кто их загрузил
+
+    Args:
+        source (str): Готовая папка
+        target (str): Заменяемая папка
+    """
+    old = f'{target}.old{os.getpid()}'
+    try:
+        if os.path.exists(target):
+            os.replace(target, old)
+        os.replace(source, target)
+    except OSError:
+        shutil.rmtree(source, ignore_errors=True)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def write_json(path, data):
+    """Записывает json файл через временный файл, чтобы читатели не увидели недописанный файл
+
+    Args:
+        path (str): Путь к файлу
+        data: Данные
+    """
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(f'{path}.tmp', path)
 
 
 def sort_exp(vac):
@@ -62,21 +129,45 @@ def sort_exp(vac):
     Returns:
          Параметр сортировки
     """
+    return experience_order[vac.raw_experience_id]
+
 
-    s = re.findall(r'\d*\.\d+|\d+', vac.experience_id)
+def exp_number(text):
+    """Находит первое число в названии требуемого опыта
+
+    Args:
+        text (str): Требуемый опыт
+
+    Returns:
+        int: Число лет опыта или 0
+    """
+    s = re.findall(r'\d*\.\d+|\d+', text)
     return 0 if len(s) == 0 else int(s[0])
 
 
-sorts = {
-    'Название': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.name),
-    'Описание': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.description),
-    'Навыки': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: len(vac.key_skills)),
-    'Опыт работы': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: sort_exp(vac)),
-    'Премиум-вакансия': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.premium),
-    'Компания': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.employer_name),
-    'Оклад': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.salary.salary_currency_to_ruble),
-    'Название региона': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.area_name),
-    'Дата публикации вакансии': lambda vac, is_rev: vac.sort(reverse=is_rev, key=lambda vac: vac.published_at)
+experience_order = {key: exp_number(value) for key, value in experience.items()}
+sort_keys = {
+    'Название': lambda vac: vac.name,
+    'Описание': lambda vac: vac.description,
+    'Навыки': lambda vac: len(vac.key_skills),
+    'Опыт работы': sort_exp,
+    'Премиум-вакансия': lambda vac: vac.premium,
+    'Компания': lambda vac: vac.employer_name,
+    'Оклад': lambda vac: vac.salary,
+    'Название региона': lambda vac: vac.area_name,
+    'Дата публикации вакансии': lambda vac: vac.published
+}
+formats = {
+    'Название': lambda vac: vac.name,
+    'Описание': lambda vac: vac.description,
+    'Навыки': lambda vac: '\n'.join(vac.key_skills),
+    'Опыт работы': lambda vac: vac.experience_id,
+    'Премиум-вакансия': lambda vac: vac.premium,
+    'Компания': lambda vac: vac.employer_name,
+    'Оклад': lambda vac: vac.make_salary(),
+    'Название региона': lambda vac: vac.area_name,
+    'Дата публикации вакансии': lambda vac: f'{vac.published_at[8:10]}.{vac.published_at[5:7]}.'
+                                            f'{vac.published_at[:4]}'
 }
 functions = {
     'Название': lambda vac, val: vac.name == val,
@@ -87,24 +178,319 @@ functions = {
     'Премиум-вакансия': lambda vac, val: vac.premium == val,
     'Название региона': lambda vac, val: vac.area_name == val,
     'Компания': lambda vac, val: vac.employer_name == val,
-    'Идентификатор валюты оклада': lambda vac, val: vac.salary.salary_currency == val,
+    'Идентификатор валюты оклада': lambda vac, val: vac.salary_currency == val,
     'Навыки': lambda vac, val: all(x in vac.key_skills for x in val.split(', ')),
-    'Оклад': lambda vac, val: float(vac.salary.salary_from) <= float(val) <= float(vac.salary.salary_to)
+    'Оклад': lambda vac, val: vac.salary_from <= float(val) <= vac.salary_to
 }
 
 
+class Rates:
+    """Таблица курсов валют к рублю по месяцам. Для месяца без курса берётся курс ближайшего предыдущего месяца
+    таблицы, а до первого месяца таблицы и для валют без курсов - постоянный курс из currency_to_rub
+
+    Attributes:
+        current (Rates): Таблица, по которой переводятся зарплаты, создаётся в get при первом обращении
+        table (dict): Курсы: валюта -> {месяц ГГГГММ: курс}
+        key (str): Хэш таблицы и постоянных курсов, по нему проверяется, что сохранённые значения
+            посчитаны по тем же курсам
+        months (dict): Отсортированные месяцы таблицы для каждой валюты
+        cache (dict): Уже найденные курсы: (валюта, месяц) -> курс
+    """
+    current = None
+
+    def __init__(self, table=None):
+        """Инициализирует объект Rates
+
+        Args:
+            table (dict): Курсы: валюта -> {месяц ГГГГММ: курс}, если не заданы - используются постоянные курсы
+        """
+        self.table = {currency: {int(month): float(rate) for month, rate in months.items()}
+                      for currency, months in (table or {}).items()}
+        self.key = hashlib.blake2b(json.dumps([currency_to_rub, self.table], sort_keys=True).encode(),
+                                   digest_size=16).hexdigest()
+        self.months = {currency: sorted(months) for currency, months in self.table.items()}
+        self.cache = {}
+
+    @staticmethod
+    def load(path):
+        """Загружает курсы из csv файла: первый столбец - месяц в виде ГГГГ-ММ (день, если есть, не учитывается),
+        остальные - курсы валют, названия столбцов - коды валют. Пустые значения пропускаются
+
+        Args:
+            path (str): Путь к файлу
+
+        Returns:
+            Rates: Таблица курсов
+        """
+        table = {}
+        with open(path, encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            titles = next(reader)
+            for row in reader:
+                month = int(row[0][:4] + row[0][5:7])
+                for currency, rate in zip(titles[1:], row[1:]):
+                    if rate.strip():
+                        table.setdefault(currency, {})[month] = float(rate)
+        return Rates(table)
+
+    @staticmethod
+    def default():
+        """Создаёт таблицу курсов из файла, указанного в переменной окружения CURRENCY_RATES,
+        или таблицу постоянных курсов, если переменная не задана
+
+        Returns:
+            Rates: Таблица курсов
+        """
+        path = os.environ.get('CURRENCY_RATES')
+        return Rates.load(path) if path else Rates()
+
+    @staticmethod
+    def get():
+        """Возвращает текущую таблицу курсов. При первом обращении она создаётся через default, поэтому файл
+        из CURRENCY_RATES читается только тогда, когда курсы действительно нужны, а не при импорте модуля
+
+        Returns:
+            Rates: Таблица, по которой переводятся зарплаты
+        """
+        if Rates.current is None:
+            Rates.current = Rates.default()
+        return Rates.current
+
+    @staticmethod
+    def use(rates):
+        """Делает таблицу курсов текущей. Кэш колонок, состояние и свёртки куба, посчитанные по другим курсам,
+        пересчитываются из сохранённых сумм и окладов без разбора csv файла, кроме состояния режима 'incremental'
+        и скетчей процентилей куба
+
+        Args:
+            rates (Rates): Таблица курсов
+        """
+        Rates.current = rates
+
+    def rate(self, currency, month):
+        """Возвращает курс валюты в заданном месяце
+
+        Args:
+            currency (str): Код валюты
+            month (int): Месяц числом ГГГГММ
+
+        Returns:
+            float: Курс к рублю
+
+        Raises:
+            KeyError: Если для валюты в этом месяце нет ни курса из таблицы, ни постоянного курса
+        """
+        rate = self.cache.get((currency, month))
+        if rate is None:
+            months = self.months.get(currency, ())
+            i = bisect_right(months, month)
+            rate = self.table[currency][months[i - 1]] if i else currency_to_rub[currency]
+            self.cache[(currency, month)] = rate
+        return rate
+
+    def convert(self, salary, currencies, codes, months):
+        """Переводит зарплаты в рубли одной векторной операцией: курсы всех валют по месяцам таблицы
+        собираются в матрицу, столбец для каждой зарплаты находится двоичным поиском по месяцам
+
+        Args:
+            salary (np.ndarray): Зарплаты в валюте вакансии
+            currencies (list): Коды валют, индекс валюты - её код в codes
+            codes (np.ndarray): Коды валют зарплат
+            months (np.ndarray): Месяцы числами ГГГГММ
+
+        Returns:
+            np.ndarray: Зарплаты в рублях
+
+        Raises:
+            KeyError: Если для валюты какой-либо зарплаты в её месяце нет ни курса из таблицы, ни постоянного курса
+        """
+        import numpy as np
+        points = sorted(set(chain.from_iterable(self.months.values())))
+        matrix = np.empty((len(currencies), len(points) + 1), dtype=np.float64)
+        for i, currency in enumerate(currencies):
+            table = self.table.get(currency, {})
+            rate = matrix[i, 0] = currency_to_rub.get(currency, np.nan)
+            for j, month in enumerate(points, 1):
+                rate = matrix[i, j] = table.get(month, rate)
+        rates = matrix[codes, np.searchsorted(np.array(points, dtype=np.int64), months, side='right')]
+        missing = np.isnan(rates)
+        if missing.any():
+            raise KeyError(currencies[codes[missing][0]])
+        return salary * rates
+
+
+class Metrics:
+    """Класс для сбора времени этапов обработки и счётчиков строк. Пока сбор не включён через start,
+    этапы не замеряются, а функции не оборачиваются, поэтому обработка не замедляется
+
+    Attributes:
+        active (Metrics): Включённый сборщик или None
+        hook: Функция, которая вызывается с записью о каждом завершённом этапе
+        stages (dict): Количество вызовов, время и процессорное время по этапам
+        counters (dict): Счётчики прочитанных, оставленных и отброшенных по разным причинам строк
+    """
+    active = None
+
+    def __init__(self, hook=None):
+        """Инициализирует объект Metrics
+
+        Args:
+            hook: Функция, которая вызывается с записью о каждом завершённом этапе
+        """
+        self.hook = hook
+        self.stages = {}
+        self.counters = {}
+
+    @staticmethod
+    def start(hook=None):
+        """Включает сбор времени и счётчиков
+
+        Args:
+            hook: Функция, которая вызывается со словарём с названием этапа, временем, процессорным временем
+                и наибольшим объёмом памяти после каждого этапа
+
+        Returns:
+            Metrics: Включённый сборщик
+        """
+        Metrics.active = Metrics(hook)
+        return Metrics.active
+
+    @staticmethod
+    def stop():
+        """Выключает сбор времени и счётчиков
+
+        Returns:
+            Metrics: Сборщик с собранными данными или None, если сбор не был включён
+        """
+        metrics, Metrics.active = Metrics.active, None
+        return metrics
+
+    @staticmethod
+    @contextmanager
+    def stage(name):
+        """Замеряет время этапа, если сбор включён. Можно использовать и как декоратор
+
+        Args:
+            name (str): Название этапа
+        """
+        metrics = Metrics.active
+        if metrics is None:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            metrics.add_time(name, wall, cpu)
+            if metrics.hook is not None:
+                metrics.hook({'stage': name, 'wall': wall, 'cpu': cpu, 'memory': Metrics.peak_memory()})
+
+    @staticmethod
+    def timed(name, function):
+        """Оборачивает функцию, которая вызывается для каждой строки, замером времени вызовов.
+        Если сбор не включён, функция возвращается без изменений
+
+        Args:
+            name (str): Название этапа
+            function: Функция
+
+        Returns:
+            Функция с замером времени
+        """
+        metrics = Metrics.active
+        if metrics is None:
+            return function
+
+        def wrapper(*args):
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                return function(*args)
+            finally:
+                metrics.add_time(name, time.perf_counter() - wall, time.process_time() - cpu)
+        return wrapper
+
+    def add_time(self, name, wall, cpu, calls=1):
+        """Добавляет время к этапу
+
+        Args:
+            name (str): Название этапа
+            wall (float): Время в секундах
+            cpu (float): Процессорное время в секундах
+            calls (int): Количество вызовов
+        """
+        stage = self.stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+        stage['calls'] += calls
+        stage['wall'] += wall
+        stage['cpu'] += cpu
+
+    def count(self, name, value=1):
+        """Увеличивает счётчик
+
+        Args:
+            name (str): Название счётчика
+            value (int): Величина увеличения
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other):
+        """Добавляет время и счётчики другого сборщика (например, из процесса, обработавшего часть файла)
+
+        Args:
+            other (Metrics): Сборщик
+        """
+        for name, stage in other.stages.items():
+            self.add_time(name, stage['wall'], stage['cpu'], stage['calls'])
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    @staticmethod
+    def peak_memory():
+        """Возвращает наибольший объём памяти текущего процесса и его завершённых дочерних процессов
+
+        Returns:
+            int: Объём памяти в байтах или None, если его нельзя узнать на этой платформе
+        """
+        try:
+            import resource
+        except ImportError:
+            return None
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def dump(self):
+        """Возвращает собранные данные
+
+        Returns:
+            dict: Время этапов, счётчики строк и наибольший объём памяти
+        """
+        return {'stages': self.stages, 'counters': self.counters, 'memory': self.peak_memory()}
+
+    def save(self, path):
+        """Сохраняет собранные данные в json файл
+
+        Args:
+            path (str): Путь к файлу
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.dump(), file, ensure_ascii=False, indent=1)
+
+
 class Vacancy:
-    """Класс для представления вакансии.
+    """Класс для представления вакансии. Хранит значения в слотах без __dict__,
+    описание, навыки, опыт работы, премиум и вычет налогов разбираются только при обращении к ним
 
     Attributes:
         name (str): Название вакансии
-        salary_from (int): Нижняя граница вилки оклада
-        salary_to (int): Верхняя граница вилки оклада
-        salary_currency (int): Валюта оклада
+        salary_from (float): Нижняя граница вилки оклада
+        salary_to (float): Верхняя граница вилки оклада
+        salary_currency (str): Валюта оклада
         area_name (str): Название региона
         published_at (str): Дата публикации
-        year (str): Год публикации
-        salary (float): Средняя зарплата в рублях
+        published (int): Дата публикации числом ГГГГММДДччммсс
+        year (int): Год публикации
+        salary (float): Средняя зарплата в рублях по курсу месяца публикации (Rates.get())
         employer_name (str): Название компании
         description (str): Описание вакансии
         key_skills (list): Навыки
@@ -112,28 +498,62 @@ class Vacancy:
         premium (bool): Значение премиум вакансии
         salary_gross (bool): Значение вычета налогов
     """
+    __slots__ = ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at', 'published',
+                 'salary', 'employer_name', 'raw_description', 'raw_key_skills', 'raw_experience_id', 'raw_premium',
+                 'raw_salary_gross')
 
     def __init__(self, vac):
         """Инициализирует объект Vacancy
 
         Args:
-            vac (dict):  Словарик одной вакансии
+            vac (dict):  Словарик одной вакансии, описание и навыки могут быть ещё не отформатированы
         """
         self.name = vac['name']
-        self.salary_from = vac['salary_from']
-        self.salary_to = vac['salary_to']
-        self.salary_currency = vac['salary_currency']
-        self.area_name = vac['area_name']
+        self.salary_from = float(vac['salary_from'])
+        self.salary_to = float(vac['salary_to'])
+        self.salary_currency = sys.intern(vac['salary_currency'])
+        self.area_name = sys.intern(vac['area_name'])
         self.published_at = vac['published_at']
-        self.year = self.published_at[:4]
-        self.salary = (float(self.salary_from) + float(self.salary_to)) / 2 * currency_to_rub[self.salary_currency]
+        self.published = parse_date(self.published_at)
+        self.salary = (self.salary_from + self.salary_to) / 2 * \
+            Rates.get().rate(self.salary_currency, self.published // 10 ** 8)
         if len(vac) > 6:
             self.employer_name = vac['employer_name']
-            self.description = vac['description']
-            self.key_skills = vac['key_skills'].split('_')
-            self.experience_id = experience[vac['experience_id']]
-            self.premium = bools[vac['premium']]
-            self.salary_gross = bools[vac['salary_gross']]
+            self.raw_description = vac['description']
+            self.raw_key_skills = vac['key_skills']
+            self.raw_experience_id = sys.intern(vac['experience_id'])
+            self.raw_premium = sys.intern(vac['premium'])
+            self.raw_salary_gross = sys.intern(vac['salary_gross'])
+
+    @property
+    def year(self):
+        """int: Год публикации"""
+        return self.published // 10 ** 10
+
+    @property
+    def description(self):
+        """str: Описание вакансии без HTML тегов и лишних пробелов"""
+        return DataSet.clean_text(self.raw_description)
+
+    @property
+    def key_skills(self):
+        """list: Навыки"""
+        return DataSet.clean_text(self.raw_key_skills).split('_')
+
+    @property
+    def experience_id(self):
+        """str: Требуемый опыт"""
+        return experience[self.raw_experience_id]
+
+    @property
+    def premium(self):
+        """str: Значение премиум вакансии"""
+        return bools[self.raw_premium]
+
+    @property
+    def salary_gross(self):
+        """str: Значение вычета налогов"""
+        return bools[self.raw_salary_gross]
 
     def make_salary(self):
         """Конвертирует значения зарпалаты в требуемый формат
@@ -141,8 +561,8 @@ class Vacancy:
         Returns:
             string: Средняя зарплата
         """
-        sal_from = '{0:,}'.format(int(float(self.salary_from))).replace(',', ' ')
-        sal_to = '{0:,}'.format(int(float(self.salary_to))).replace(',', ' ')
+        sal_from = '{0:,}'.format(int(self.salary_from)).replace(',', ' ')
+        sal_to = '{0:,}'.format(int(self.salary_to)).replace(',', ' ')
         return f'{sal_from} - {sal_to} ({self.salary_currency}) ({self.salary_gross})'
 
     def __str__(self):
@@ -151,135 +571,2311 @@ class Vacancy:
         Returns:
             list: Значения объектов Vacancy в списке
         """
-        return [self.name, self.description, '\n'.join(self.key_skills), self.experience_id, self.premium,
-                self.employer_name, self.make_salary(), self.area_name,
-                f'{self.published_at[8:10]}.{self.published_at[5:7]}.{self.published_at[:4]}']
+        return [formats[title](self) for title in translation]
 
 
-class DataSet:
-    """Класс для подсчётов данных
+class Columns:
+    """Колоночное хранилище вакансий. Зарплаты, год и дата публикации хранятся в массивах NumPy,
+    строковые параметры (название, город, компания, валюта, опыт) - в виде целочисленных кодов словаря,
+    длинные тексты - одной строкой байт с массивом смещений. В кэше смещения хранятся файлами .bin из чисел int64,
+    чтобы при разборе их можно было дописывать в файл частями
+
+    Attributes:
+        titles (list): Названия столбцов исходного файла
+        values (dict): Списки различных значений строковых параметров, индекс значения - его код
+        codes (dict): Массивы кодов строковых параметров для каждой вакансии
+        salary_from (np.ndarray): Нижняя граница вилки оклада
+        salary_to (np.ndarray): Верхняя граница вилки оклада
+        year (np.ndarray): Год публикации
+        published (np.ndarray): Дата публикации числом ГГГГММДДччммсс
+        salary (np.ndarray): Средняя зарплата в рублях
+        groups (dict): Запомненные группировки вакансий по годам и месяцам
+        blobs (dict): Байты текстовых столбцов в кодировке utf-8
+        offsets (dict): Смещения начала значений текстовых столбцов в blobs
+        folder (str): Папка, в которую тексты записаны при разборе, или None, если тексты хранятся в памяти
+    """
+    coded = ('name', 'area_name', 'employer_name', 'salary_currency', 'experience_id', 'premium', 'salary_gross')
+    texts = ('description', 'key_skills', 'published_at')
+
+    def __init__(self, rows=(), texts=(), folder=None):
+        """Инициализирует объект Columns
+
+        Args:
+            rows: Итератор словарей вакансий
+            texts (tuple): Текстовые столбцы, которые нужно сохранить (для статистики они не нужны)
+            folder (str): Существующая папка, в файлы которой тексты и их смещения записываются сразу при разборе
+                и затем отображаются в память, поэтому память на тексты не растёт с размером файла. Если не задана -
+                тексты собираются в памяти
+        """
+        import numpy as np
+        self.titles = []
+        self.values = {key: [] for key in self.coded}
+        indexes = {key: {} for key in self.coded}
+        codes = {key: array('i') for key in self.coded}
+        salary_from = array('d')
+        salary_to = array('d')
+        year = array('i')
+        published = array('q')
+        self.folder = folder
+        sinks = {name: open(os.path.join(folder, f'{name}.bin'), 'wb') if folder else io.BytesIO()
+                 for key in texts for name in (key, f'{key}.offsets')}
+        ends = dict.fromkeys(texts, 0)
+        offsets = {key: array('q', [0]) for key in texts}
+        try:
+            for row in rows:
+                if not self.titles:
+                    self.titles = list(row)
+                for key in self.coded:
+                    value = row.get(key, '')
+                    code = indexes[key].get(value)
+                    if code is None:
+                        code = indexes[key][value] = len(self.values[key])
+                        self.values[key].append(value)
+                    codes[key].append(code)
+                salary_from.append(float(row['salary_from']))
+                salary_to.append(float(row['salary_to']))
+                published.append(parse_date(row['published_at']))
+                year.append(published[-1] // 10 ** 10)
+                for key in texts:
+                    value = row.get(key, '').encode()
+                    sinks[key].write(value)
+                    ends[key] += len(value)
+                    offsets[key].append(ends[key])
+                    if len(offsets[key]) >= offsets_chunk:
+                        offsets[key].tofile(sinks[f'{key}.offsets'])
+                        del offsets[key][:]
+            for key in texts:
+                offsets[key].tofile(sinks[f'{key}.offsets'])
+        finally:
+            if folder:
+                for sink in sinks.values():
+                    sink.close()
+        data = {name: self.map_file(os.path.join(folder, f'{name}.bin')) if folder else sink.getvalue()
+                for name, sink in sinks.items()}
+        self.blobs = {key: data[key] for key in texts}
+        self.offsets = {key: np.frombuffer(data[f'{key}.offsets'], dtype=np.int64) for key in texts}
+        self.codes = {key: np.array(codes[key], dtype=np.int32) for key in self.coded}
+        self.salary_from = np.array(salary_from, dtype=np.float64)
+        self.salary_to = np.array(salary_to, dtype=np.float64)
+        self.year = np.array(year, dtype=np.int32)
+        self.published = np.array(published, dtype=np.int64)
+        self.salary = self.convert()
+        self.groups = {}
+
+    def __len__(self):
+        """Возвращает количество вакансий"""
+        return len(self.year)
+
+    @staticmethod
+    def map_file(path):
+        """Отображает файл в память только для чтения
+
+        Args:
+            path (str): Путь к файлу
+
+        Returns:
+            mmap: Содержимое файла (b'' для пустого файла, который нельзя отобразить)
+        """
+        with open(path, 'rb') as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b''
+
+    @staticmethod
+    def temp_folder(folder):
+        """Возвращает временную папку, в которой собирается кэш перед заменой папки folder
+
+        Args:
+            folder (str): Папка кэша
+
+        Returns:
+            str: Временная папка
+        """
+        return f'{folder}.tmp{os.getpid()}'
+
+    def convert(self):
+        """Переводит средние зарплаты в рубли по курсам месяца публикации одной векторной операцией
+
+        Returns:
+            np.ndarray: Средняя зарплата в рублях
+        """
+        return Rates.get().convert((self.salary_from + self.salary_to) / 2, self.values['salary_currency'],
+                                   self.codes['salary_currency'], self.published // 10 ** 8)
+
+    def group(self, period='year'):
+        """Группирует вакансии по годам или месяцам, результат запоминается
+
+        Args:
+            period (str): 'year' - по годам, 'month' - по месяцам (месяц - число вида ГГГГММ)
+
+        Returns:
+            tuple: Список периодов в порядке их первого появления в файле и массив номеров периода для каждой вакансии
+        """
+        import numpy as np
+        if period not in self.groups:
+            values = self.year if period == 'year' else self.published // 10 ** 8
+            periods, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+            order = np.argsort(first, kind='stable')
+            rank = np.empty(len(periods), dtype=np.intp)
+            rank[order] = np.arange(len(periods))
+            self.groups[period] = ([int(x) for x in periods[order]], rank[inverse.ravel()])
+        return self.groups[period]
+
+    def match(self, key, predicate):
+        """Проверяет условие для каждого различного значения параметра, а не для каждой вакансии
+
+        Args:
+            key (str): Название параметра
+            predicate: Функция проверки значения
+
+        Returns:
+            np.ndarray: Маска вакансий, для которых условие выполнено
+        """
+        import numpy as np
+        matched = np.array([predicate(x) for x in self.values[key]], dtype=bool)
+        return matched[self.codes[key]]
+
+    def text(self, key, i):
+        """Возвращает значение текстового столбца
+
+        Args:
+            key (str): Название столбца
+            i (int): Номер вакансии
+
+        Returns:
+            str: Значение
+        """
+        return self.blobs[key][self.offsets[key][i]:self.offsets[key][i + 1]].decode()
+
+    def row(self, i):
+        """Собирает словарь одной вакансии в том же виде, что и CSV_reader
+
+        Args:
+            i (int): Номер вакансии
+
+        Returns:
+            dict: Словарь одной вакансии
+        """
+        row = {}
+        for key in self.titles:
+            if key in self.values:
+                row[key] = self.values[key][self.codes[key][i]]
+            elif key in self.offsets:
+                row[key] = self.text(key, i)
+            elif key in ('salary_from', 'salary_to'):
+                row[key] = str(getattr(self, key)[i].item())
+        return row
+
+    def rows(self):
+        """Собирает словари всех вакансий, переводя столбцы в списки целиком, а не по одному значению
+
+        Yields:
+            dict: Словарь одной вакансии
+        """
+        keys = []
+        columns = []
+        for key in self.titles:
+            if key in self.values:
+                values = self.values[key]
+                columns.append([values[code] for code in self.codes[key].tolist()])
+            elif key in self.offsets:
+                blob = self.blobs[key]
+                offsets = self.offsets[key].tolist()
+                columns.append([blob[start:end].decode() for start, end in zip(offsets, offsets[1:])])
+            elif key in ('salary_from', 'salary_to'):
+                columns.append([str(x) for x in getattr(self, key).tolist()])
+            else:
+                continue
+            keys.append(key)
+        for values in zip(*columns):
+            yield dict(zip(keys, values))
+
+    def select(self, ids):
+        """Возвращает колоночное хранилище вакансий с заданными номерами. В словари значений попадают только
+        встречающиеся у этих вакансий значения, в том же порядке, что и в исходном хранилище
+
+        Args:
+            ids (np.ndarray): Номера вакансий по возрастанию
+
+        Returns:
+            Columns: Колоночное хранилище выбранных вакансий
+        """
+        import numpy as np
+        columns = Columns()
+        columns.titles = self.titles
+        for key in self.coded:
+            used, codes = np.unique(self.codes[key][ids], return_inverse=True)
+            columns.values[key] = [self.values[key][code] for code in used.tolist()]
+            columns.codes[key] = codes.ravel().astype(np.int32)
+        for key in ('salary_from', 'salary_to', 'year', 'published', 'salary'):
+            setattr(columns, key, np.asarray(getattr(self, key))[ids])
+        columns.blobs = {}
+        columns.offsets = {}
+        for key, blob in self.blobs.items():
+            starts = self.offsets[key][ids]
+            ends = self.offsets[key][ids + 1]
+            columns.blobs[key] = b''.join(blob[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+            columns.offsets[key] = np.concatenate(([0], np.cumsum(ends - starts))).astype(np.int64)
+        return columns
+
+    def save(self, folder, source):
+        """Сохраняет столбцы в папку: массивы - в файлы .npy, тексты - в файлы .bin.
+        Файлы записываются во временную папку, которая затем заменяет прежнюю, поэтому файлы кэша,
+        уже отображённые в память другими объектами Columns, не перезаписываются. Если тексты уже записаны
+        при разборе во временную папку temp_folder(folder), они не копируются
+
+        Args:
+            folder (str): Папка кэша
+            source (dict): Отпечаток исходного файла
+        """
+        import numpy as np
+        target = folder
+        folder = self.temp_folder(target)
+        written = self.folder == folder
+        if not written:
+            shutil.rmtree(folder, ignore_errors=True)
+            os.makedirs(folder)
+        meta_path = os.path.join(folder, 'meta.json')
+        arrays = {'salary_from': self.salary_from, 'salary_to': self.salary_to, 'year': self.year,
+                  'published': self.published, 'salary': self.salary}
+        arrays.update({f'{key}.codes': value for key, value in self.codes.items()})
+        for key, value in arrays.items():
+            np.save(os.path.join(folder, f'{key}.npy'), value)
+        if not written:
+            for key, value in self.blobs.items():
+                with open(os.path.join(folder, f'{key}.bin'), 'wb') as file:
+                    file.write(value)
+                np.asarray(self.offsets[key], dtype=np.int64).tofile(os.path.join(folder, f'{key}.offsets.bin'))
+        meta = {'version': cache_version, 'source': source, 'titles': self.titles, 'values': self.values,
+                'texts': list(self.blobs), 'rates': Rates.get().key}
+        with open(meta_path, 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+        replace_folder(folder, target)
+        if written:
+            self.folder = target
+
+    @staticmethod
+    def load(folder, meta):
+        """Загружает столбцы из папки кэша, массивы и тексты отображаются в память без чтения файлов целиком.
+        Если кэш сохранён с другими курсами валют, зарплаты в рублях пересчитываются по сохранённым окладам
+
+        Args:
+            folder (str): Папка кэша
+            meta (dict): Содержимое meta.json
+
+        Returns:
+            Columns: Колоночное хранилище вакансий
+        """
+        import numpy as np
+        columns = Columns()
+        columns.groups = {}
+        columns.titles = meta['titles']
+        columns.values = meta['values']
+        for key in ('salary_from', 'salary_to', 'year', 'published', 'salary'):
+            setattr(columns, key, np.load(os.path.join(folder, f'{key}.npy'), mmap_mode='r'))
+        columns.codes = {key: np.load(os.path.join(folder, f'{key}.codes.npy'), mmap_mode='r')
+                         for key in Columns.coded}
+        if meta.get('rates') != Rates.get().key:
+            columns.salary = columns.convert()
+        columns.offsets = {key: np.frombuffer(Columns.map_file(os.path.join(folder, f'{key}.offsets.bin')),
+                                              dtype=np.int64) for key in meta['texts']}
+        columns.blobs = {key: Columns.map_file(os.path.join(folder, f'{key}.bin')) for key in meta['texts']}
+        return columns
+
+
+class Rows:
+    """Ленивая последовательность вакансий csv файла. Файл отображается в память, а для каждой полной строки
+    хранятся только байтовые смещения начала и конца записи, поэтому вакансия разбирается только при обращении
+    к ней. Срезы и выборки по номерам возвращают такие же последовательности без разбора строк
 
     Attributes:
         file_name (str): Название файла
-        vacancies_objects (list): Список вакансий
-        vac_amount (int): Количество вакансий
-        sal_by_years (dict): Зарплата по годам
-        sal_by_years_for_prof (dict): Зарплата по годам для конкретной профессии
-        sal_by_city (dict): Зарплата по городам
-        amount_by_years (dict): Количество вакансий по годам
-        amount_prof_by_years (dict): Количество вакансий по годам для конкретной профессии
-        amount_by_city (dict): Количество вакансий по городам
+        titles (list): Названия столбцов
+        starts (array): Смещения начала записей
+        ends (array): Смещения конца записей
+        data (mmap): Содержимое файла
+        cleaners (list): Функции форматирования значений столбцов
     """
 
-    def __init__(self, f_name):
-        """Инициализирует объект DataSet
+    def __init__(self, csv_file, titles, starts, ends, data=None):
+        """Инициализирует объект Rows
 
         Args:
-            f_name (str): Название файла
+            csv_file: csv файл
+            titles (list): Названия столбцов
+            starts (array): Смещения начала записей
+            ends (array): Смещения конца записей
+            data (mmap): Уже отображённое в память содержимое файла, если не задано - файл отображается заново
         """
-        self.file_name = f_name
-        self.vacancies_objects = [Vacancy(obj) for obj in self.CSV_parser(self.file_name)]
-        self.vac_amount = len(self.vacancies_objects)
-        self.sal_by_years = {}
-        self.sal_by_years_for_prof = {}
-        self.sal_by_city = {}
-        self.amount_by_years = {}
-        self.amount_prof_by_years = {}
-        self.amount_by_city = {}
+        self.file_name = csv_file
+        self.titles = titles
+        self.starts = starts
+        self.ends = ends
+        if data is None:
+            with open(csv_file, 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                    if os.fstat(file.fileno()).st_size else b''
+        self.data = data
+        self.cleaners = DataSet.get_cleaners(titles)
+
+    @staticmethod
+    def text(line):
+        """Переводит байты csv файла в текст с такими же переводами строк, как при чтении в текстовом режиме:
+        '\r\n' и одиночный '\r' заменяются на '\n'
+
+        Args:
+            line (bytes): Байты файла
+
+        Returns:
+            str: Текст
+        """
+        return line.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+    @staticmethod
+    def scan(csv_file):
+        """Один раз читает файл и находит смещения полных записей, неполные записи пропускаются и считаются
+        в Metrics так же, как в rows_filter. Строки делятся по '\r\n', '\r' и '\n', как в текстовом режиме
+
+        Args:
+            csv_file: csv файл
+
+        Returns:
+            tuple: Названия столбцов, смещения начала и смещения конца записей
+        """
+        starts = array('q')
+        ends = array('q')
+        read = broken = empty = 0
+        with open(csv_file, 'rb') as file:
+            header = file.readline()
+            titles = next(csv.reader([header.decode('utf-8-sig')]))
+            pos = len(header)
+
+            def lines():
+                nonlocal pos
+                for line in file:
+                    for part in re.findall(rb'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+', line) if b'\r' in line else (line,):
+                        pos += len(part)
+                        yield Rows.text(part)
+            start = pos
+            for x in csv.reader(lines()):
+                read += 1
+                if len(x) != len(titles):
+                    broken += 1
+                elif '' in x:
+                    empty += 1
+                else:
+                    starts.append(start)
+                    ends.append(pos)
+                start = pos
+        metrics = Metrics.active
+        if metrics is not None:
+            metrics.count('rows_read', read)
+            metrics.count('rows_kept', read - broken - empty)
+            metrics.count('rows_dropped_columns', broken)
+            metrics.count('rows_dropped_empty', empty)
+        return titles, starts, ends
+
+    def __len__(self):
+        """Возвращает количество вакансий"""
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        """Разбирает вакансию по номеру или возвращает последовательность вакансий среза
+
+        Args:
+            i: Номер вакансии или срез
+
+        Returns:
+            Vacancy или Rows
+        """
+        if isinstance(i, slice):
+            return Rows(self.file_name, self.titles, self.starts[i], self.ends[i], self.data)
+        x = next(csv.reader(io.StringIO(Rows.text(self.data[self.starts[i]:self.ends[i]]), newline='')))
+        return Vacancy({title: clean(s) for title, clean, s in zip(self.titles, self.cleaners, x)})
+
+    def __iter__(self):
+        """Перебирает вакансии, разбирая их по очереди"""
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, ids):
+        """Возвращает последовательность вакансий с заданными номерами, например найденных по индексу
+
+        Args:
+            ids: Номера вакансий
+
+        Returns:
+            Rows: Последовательность вакансий
+        """
+        return Rows(self.file_name, self.titles, array('q', (self.starts[i] for i in ids)),
+                    array('q', (self.ends[i] for i in ids)), self.data)
+
+    def save(self, path, source):
+        """Сохраняет смещения в файл: первая строка - заголовок в json, за ней - массивы смещений
+
+        Args:
+            path (str): Путь к файлу
+            source (dict): Отпечаток исходного файла
+        """
+        meta = {'version': rows_version, 'source': source, 'titles': self.titles, 'count': len(self)}
+        with open(f'{path}.tmp', 'wb') as file:
+            file.write(json.dumps(meta, ensure_ascii=False).encode() + b'\n')
+            self.starts.tofile(file)
+            self.ends.tofile(file)
+        os.replace(f'{path}.tmp', path)
+
+    @staticmethod
+    def load(csv_file, path):
+        """Загружает смещения из файла, если он создан по текущей версии csv файла
+
+        Args:
+            csv_file: csv файл
+            path (str): Путь к файлу смещений
+
+        Returns:
+            Rows: Последовательность вакансий или None, если файл смещений недействителен
+        """
+        with open(path, 'rb') as file:
+            meta = json.loads(file.readline())
+            mtime = meta['source']['mtime']
+            if meta['version'] != rows_version or not DataSet.is_actual(csv_file, meta['source']):
+                return None
+            starts = array('q')
+            ends = array('q')
+            starts.fromfile(file, meta['count'])
+            ends.fromfile(file, meta['count'])
+        rows = Rows(csv_file, meta['titles'], starts, ends)
+        if meta['source']['mtime'] != mtime:
+            rows.save(path, meta['source'])
+        return rows
+
+
+class Index:
+    """Индексы вакансий для фильтров таблицы, строятся один раз для объекта DataSet
+
+    Attributes:
+        hashes (dict): Хэш-индексы: параметр фильтрации -> {значение: номера вакансий}
+        skills (dict): Инвертированный индекс навыков: навык -> номера вакансий
+        from_values (list): Отсортированные нижние границы вилки оклада
+        from_ids (list): Номера вакансий в порядке from_values
+        to_values (list): Отсортированные верхние границы вилки оклада
+        to_ids (list): Номера вакансий в порядке to_values
+        time_values (list): Отсортированные даты публикации
+        time_ids (list): Номера вакансий в порядке time_values, при равных датах - в исходном порядке
+    """
+    hashed = {'Название региона': 'area_name', 'Компания': 'employer_name', 'Опыт работы': 'experience_id',
+              'Идентификатор валюты оклада': 'salary_currency'}
+
+    def __init__(self, vacancies):
+        """Инициализирует объект Index
+
+        Args:
+            vacancies (list): Список вакансий
+        """
+        self.hashes = {param: {} for param in self.hashed}
+        self.skills = {}
+        salary_from = []
+        salary_to = []
+        published = []
+        for i, vac in enumerate(vacancies):
+            for param, key in self.hashed.items():
+                self.hashes[param].setdefault(getattr(vac, key, None), array('i')).append(i)
+            for skill in set(getattr(vac, 'key_skills', ())):
+                self.skills.setdefault(skill, array('i')).append(i)
+            salary_from.append(vac.salary_from)
+            salary_to.append(vac.salary_to)
+            published.append(vac.published)
+        self.from_ids = sorted(range(len(salary_from)), key=salary_from.__getitem__)
+        self.from_values = [salary_from[i] for i in self.from_ids]
+        self.to_ids = sorted(range(len(salary_to)), key=salary_to.__getitem__)
+        self.to_values = [salary_to[i] for i in self.to_ids]
+        self.time_ids = sorted(range(len(published)), key=published.__getitem__)
+        self.time_values = [published[i] for i in self.time_ids]
+
+    def find(self, param, value):
+        """Ищет вакансии, подходящие под фильтр
+
+        Args:
+            param (str): Параметр фильтрации
+            value (str): Значение фильтра
+
+        Returns:
+            list: Номера подходящих вакансий по возрастанию или None, если для параметра нет индекса
+        """
+        if param in self.hashes:
+            return list(self.hashes[param].get(value, ()))
+        if param == 'Навыки':
+            postings = sorted((self.skills.get(x, ()) for x in value.split(', ')), key=len)
+            found = set(postings[0])
+            for posting in postings[1:]:
+                found.intersection_update(posting)
+            return sorted(found)
+        if param == 'Оклад':
+            low, high = Query.get_range(param, value)
+            found = set(self.from_ids[:bisect_right(self.from_values, high)])
+            return sorted(found.intersection(self.to_ids[bisect_left(self.to_values, low):]))
+        if param == 'Дата публикации вакансии':
+            low, high = Query.get_range(param, value)
+            return sorted(self.time_ids[bisect_left(self.time_values, low):bisect_right(self.time_values, high)])
+        return None
+
+    def by_time(self, reverse=False):
+        """Перебирает номера вакансий в порядке даты публикации. Вакансии с равной датой идут в исходном порядке
+        и при обратном порядке, как при устойчивой сортировке
+
+        Args:
+            reverse (bool): Сначала самые новые вакансии
+
+        Yields:
+            int: Номер вакансии
+        """
+        if not reverse:
+            yield from self.time_ids
+            return
+        end = len(self.time_values)
+        while end:
+            start = bisect_left(self.time_values, self.time_values[end - 1], 0, end)
+            yield from self.time_ids[start:end]
+            end = start
+
+
+class Query:
+    """Составной фильтр таблицы: условия вида "Параметр: значение", объединённые через ' И ' и ' ИЛИ ',
+    И связывает сильнее ИЛИ. Текст делится по ' И ' и ' ИЛИ ' только перед названием известного параметра
+    с двоеточием, поэтому эти слова могут встречаться в значениях. Для оклада и даты публикации значением
+    может быть диапазон "от - до".
+    Значения условий разбираются один раз при создании фильтра, а внутри группы И условия проверяются,
+    начиная с самых избирательных, и проверка вакансии прекращается на первом невыполненном условии
+
+    Attributes:
+        text (str): Текст фильтра
+        groups (list): Группы условий, объединённые через ИЛИ. Группа - список условий (параметр, значение, проверка),
+            объединённых через И
+    """
+    coded = {'Название': 'name', 'Название региона': 'area_name', 'Компания': 'employer_name',
+             'Идентификатор валюты оклада': 'salary_currency'}
+    separator = re.compile(r' (ИЛИ|И) (?=(?:' + '|'.join(map(re.escape, translation + ['Идентификатор валюты оклада']))
+                           + r'): )')
+
+    def __init__(self, text):
+        """Инициализирует объект Query
+
+        Args:
+            text (str): Текст фильтра
+
+        Raises:
+            ValueError: Если фильтр задан некорректно, текст ошибки - сообщение для пользователя
+        """
+        self.text = text
+        self.groups = [[]]
+        for i, part in enumerate(self.separator.split(text)):
+            if i % 2 == 0:
+                self.groups[-1].append(self.parse(part))
+            elif part == 'ИЛИ':
+                self.groups.append([])
+
+    def __reduce__(self):
+        """Передаёт фильтр в другие процессы текстом, функции проверки создаются заново"""
+        return Query, (self.text,)
+
+    @staticmethod
+    def parse(condition):
+        """Разбирает одно условие фильтра
+
+        Args:
+            condition (str): Условие вида "Параметр: значение"
+
+        Returns:
+            tuple: Параметр, значение и функция проверки вакансии
+        """
+        if ': ' not in condition:
+            raise ValueError('Формат ввода некорректен')
+        param, value = condition.split(': ', 1)
+        if param not in translation and param != 'Идентификатор валюты оклада':
+            raise ValueError('Параметр поиска некорректен')
+        return param, value, Query.compile(param, value)
+
+    @staticmethod
+    def get_range(param, value):
+        """Переводит значение фильтра по окладу или дате публикации в границы диапазона
+
+        Args:
+            param (str): 'Оклад' или 'Дата публикации вакансии'
+            value (str): Значение или диапазон "от - до", дата в виде ДД.ММ.ГГГГ
+
+        Returns:
+            tuple: Нижняя и верхняя границы, оклад - числами, дата - числами ГГГГММДДччммсс от начала
+                первого до конца последнего дня
+        """
+        bounds = value.split(' - ')
+        if len(bounds) > 2:
+            raise ValueError('Значение фильтра некорректно')
+        if param == 'Оклад':
+            try:
+                bounds = [float(x) for x in bounds]
+            except ValueError:
+                raise ValueError('Значение фильтра некорректно')
+        else:
+            if not all(re.fullmatch(r'\d{2}\.\d{2}\.\d{4}', x) for x in bounds):
+                raise ValueError('Значение фильтра некорректно')
+            return int(f'{bounds[0][6:]}{bounds[0][3:5]}{bounds[0][:2]}000000'), \
+                int(f'{bounds[-1][6:]}{bounds[-1][3:5]}{bounds[-1][:2]}235959')
+        return bounds[0], bounds[-1]
+
+    @staticmethod
+    def compile(param, value):
+        """Создаёт функцию проверки вакансии с заранее разобранным значением условия
+
+        Args:
+            param (str): Параметр фильтрации
+            value (str): Значение фильтра
+
+        Returns:
+            Функция, принимающая вакансию и возвращающая, выполнено ли условие
+        """
+        if param == 'Оклад':
+            low, high = Query.get_range(param, value)
+            return lambda vac: vac.salary_from <= high and low <= vac.salary_to
+        if param == 'Дата публикации вакансии':
+            low, high = Query.get_range(param, value)
+            return lambda vac: low <= vac.published <= high
+        if param == 'Навыки':
+            skills = set(value.split(', '))
+            return lambda vac: skills.issubset(vac.key_skills)
+        function = functions[param]
+        return lambda vac: function(vac, value)
+
+    def key(self):
+        """Возвращает нормализованный вид фильтра, не зависящий от порядка условий и групп
+
+        Returns:
+            tuple: Отсортированные группы отсортированных пар (параметр, значение)
+        """
+        return tuple(sorted(tuple(sorted((param, value) for param, value, _ in group)) for group in self.groups))
+
+    @staticmethod
+    def order(checks, sample):
+        """Упорядочивает проверки по доле вакансий выборки, прошедших их, самые избирательные - первыми
+
+        Args:
+            checks (list): Функции проверки вакансии
+            sample (list): Выборка вакансий
+
+        Returns:
+            list: Функции проверки в порядке проверки
+        """
+        if len(checks) < 2 or not sample:
+            return checks
+        return sorted(checks, key=lambda check: sum(map(check, sample)))
+
+    def match(self, group, vacancies, index=None, skip=(), sample=1000):
+        """Ищет вакансии, подходящие под группу условий, объединённых через И.
+        Условия с индексом дают готовые номера вакансий, они пересекаются от меньшего списка к большему,
+        остальные условия проверяются только для оставшихся вакансий
+
+        Args:
+            group (list): Условия группы
+            vacancies (list): Список вакансий
+            index (Index): Индексы вакансий, если построены
+            skip (set): Номера вакансий, которые уже подошли под другую группу
+            sample (int): Размер выборки для оценки избирательности условий
+
+        Returns:
+            list: Номера подходящих вакансий по возрастанию
+        """
+        found = []
+        checks = []
+        for param, value, check in group:
+            ids = index.find(param, value) if index else None
+            if ids is None:
+                checks.append(check)
+            else:
+                found.append(ids)
+        if found:
+            found.sort(key=len)
+            candidates = set(found[0])
+            for ids in found[1:]:
+                candidates.intersection_update(ids)
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(vacancies))
+        step = max(len(candidates) // sample, 1)
+        checks = self.order(checks, [vacancies[i] for i in candidates[::step]])
+        result = []
+        for i in candidates:
+            if i not in skip:
+                vac = vacancies[i]
+                if all(check(vac) for check in checks):
+                    result.append(i)
+        return result
+
+    def filter(self, vacancies, index=None):
+        """Отбирает вакансии, подходящие под фильтр
+
+        Args:
+            vacancies (list): Список вакансий или последовательность Rows
+            index (Index): Индексы вакансий, если построены
+
+        Returns:
+            list: Подходящие вакансии в исходном порядке, для Rows - последовательность Rows без разбора строк
+        """
+        if len(self.groups) == 1:
+            ids = self.match(self.groups[0], vacancies, index)
+        else:
+            found = set()
+            for group in self.groups:
+                found.update(self.match(group, vacancies, index, found))
+            ids = sorted(found)
+        if isinstance(vacancies, Rows):
+            return vacancies.take(ids)
+        return [vacancies[i] for i in ids]
+
+    @staticmethod
+    def column_mask(param, value, columns):
+        """Проверяет условие по массивам колоночного хранилища
+
+        Args:
+            param (str): Параметр фильтрации
+            value (str): Значение фильтра
+            columns (Columns): Колоночное хранилище вакансий
+
+        Returns:
+            np.ndarray: Маска вакансий, для которых условие выполнено, или None, если условие
+                нельзя проверить по массивам
+        """
+        if param == 'Дата публикации вакансии':
+            low, high = Query.get_range(param, value)
+            return (columns.published >= low) & (columns.published <= high)
+        if param == 'Оклад':
+            low, high = Query.get_range(param, value)
+            return (columns.salary_from <= high) & (columns.salary_to >= low)
+        if param in Query.coded:
+            return columns.match(Query.coded[param], lambda x: x == value)
+        return None
+
+    def mask(self, columns):
+        """Отбирает вакансии колоночного хранилища, подходящие под фильтр. Условия по дате, окладу и строковым
+        параметрам проверяются по массивам, остальные - по вакансиям, прошедшим эти условия
+
+        Args:
+            columns (Columns): Колоночное хранилище вакансий
+
+        Returns:
+            np.ndarray: Маска подходящих вакансий
+        """
+        import numpy as np
+        result = np.zeros(len(columns), dtype=bool)
+        for group in self.groups:
+            mask = np.ones(len(columns), dtype=bool)
+            checks = []
+            for param, value, check in group:
+                condition = self.column_mask(param, value, columns)
+                if condition is None:
+                    checks.append(check)
+                else:
+                    mask &= condition
+            if checks:
+                for i in np.flatnonzero(mask & ~result).tolist():
+                    vac = Vacancy(columns.row(i))
+                    mask[i] = all(check(vac) for check in checks)
+            result |= mask
+        return result
+
+    def may_match(self, part):
+        """Проверяет по метаданным части файла, могут ли в ней быть подходящие вакансии.
+        Часть отбрасывается, если в каждой группе И есть условие по дате, окладу или региону,
+        которое не выполняется ни для одной вакансии части
+
+        Args:
+            part (dict): Метаданные части: диапазоны дат публикации и окладов и список регионов
+
+        Returns:
+            bool: Нужно ли читать часть
+        """
+        for group in self.groups:
+            for param, value, _ in group:
+                if param == 'Дата публикации вакансии':
+                    low, high = self.get_range(param, value)
+                    if high < part['published'][0] or part['published'][1] < low:
+                        break
+                elif param == 'Оклад':
+                    low, high = self.get_range(param, value)
+                    if high < part['salary'][0] or part['salary'][1] < low:
+                        break
+                elif param == 'Название региона' and value not in part['regions']:
+                    break
+            else:
+                return True
+        return False
+
+
+class Automaton:
+    """Автомат Ахо-Корасик для поиска сразу нескольких подстрок за один проход по строке
+
+    Attributes:
+        goto (list): Переходы: для каждого состояния словарь символ -> следующее состояние
+        fail (list): Суффиксные ссылки состояний
+        out (list): Номера подстрок, которые найдены при переходе в состояние
+    """
+
+    def __init__(self, patterns):
+        """Инициализирует объект Automaton
+
+        Args:
+            patterns (list): Искомые подстроки
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [set()]
+        for i, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(set())
+                state = self.goto[state][char]
+            self.out[state].add(i)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.out[child] |= self.out[self.fail[child]]
+
+    def find(self, text):
+        """Ищет подстроки в тексте
+
+        Args:
+            text (str): Текст
+
+        Returns:
+            set: Номера найденных подстрок
+        """
+        state = 0
+        found = set(self.out[0])
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found |= self.out[state]
+        return found
+
+
+class Sketch:
+    """Скетч KLL для приближённых квантилей потока чисел в ограниченной памяти.
+    Значения хранятся по уровням, значение уровня h заменяет 2 ** h исходных значений. Переполненный уровень
+    сортируется, и в следующий уровень переходит каждое второе значение, поэтому память растёт
+    не быстрее логарифма от количества значений. Скетчи, собранные по частям данных, объединяются через merge
+
+    Attributes:
+        k (int): Ёмкость верхнего уровня, от неё зависит точность
+        levels (list): Значения по уровням
+        limit (int): Суммарная ёмкость уровней, при её достижении уровни сжимаются
+        size (int): Количество хранимых значений
+        count (int): Количество добавленных значений
+        flip (int): Смещение, с которого берутся значения при следующем сжатии уровня
+    """
+
+    def __init__(self, k=sketch_size):
+        """Инициализирует объект Sketch
+
+        Args:
+            k (int): Ёмкость верхнего уровня
+        """
+        self.k = k
+        self.levels = [[]]
+        self.limit = self.capacity(0)
+        self.size = 0
+        self.count = 0
+        self.flip = 0
+
+    def capacity(self, h):
+        """Возвращает ёмкость уровня: верхний вмещает k значений, каждый следующий вниз - в полтора раза меньше
+
+        Args:
+            h (int): Номер уровня
+
+        Returns:
+            int: Ёмкость уровня
+        """
+        return max(int(self.k * (2 / 3) ** (len(self.levels) - h - 1)), 2)
+
+    def grow(self):
+        """Добавляет новый верхний уровень"""
+        self.levels.append([])
+        self.limit = sum(self.capacity(h) for h in range(len(self.levels)))
+
+    def add(self, value):
+        """Добавляет одно значение
+
+        Args:
+            value (float): Значение
+        """
+        self.levels[0].append(value)
+        self.size += 1
+        self.count += 1
+        if self.size >= self.limit:
+            self.compress()
+
+    def extend(self, values):
+        """Добавляет сразу много значений
+
+        Args:
+            values (list): Значения
+        """
+        self.levels[0].extend(values)
+        self.size += len(values)
+        self.count += len(values)
+        while self.size >= self.limit:
+            self.compress()
+
+    def compress(self):
+        """Сжимает переполненные уровни снизу вверх, пока значения не поместятся в суммарную ёмкость"""
+        for h in range(len(self.levels)):
+            level = self.levels[h]
+            if len(level) < self.capacity(h):
+                continue
+            if h + 1 == len(self.levels):
+                self.grow()
+            level.sort()
+            odd = len(level) % 2
+            self.levels[h + 1].extend(level[odd + self.flip::2])
+            del level[odd:]
+            self.flip = 1 - self.flip
+            self.size = sum(len(x) for x in self.levels)
+            if self.size < self.limit:
+                break
+
+    def merge(self, other):
+        """Добавляет значения другого скетча
+
+        Args:
+            other (Sketch): Скетч, собранный по другой части данных
+        """
+        while len(self.levels) < len(other.levels):
+            self.grow()
+        for level, values in zip(self.levels, other.levels):
+            level.extend(values)
+        self.count += other.count
+        self.size = sum(len(x) for x in self.levels)
+        while self.size >= self.limit:
+            self.compress()
+
+    def quantiles(self, qs):
+        """Оценивает квантили добавленных значений
+
+        Args:
+            qs (tuple): Уровни квантилей от 0 до 1
+
+        Returns:
+            list: Значения квантилей, 0 для пустого скетча
+        """
+        items = sorted((value, 1 << h) for h, level in enumerate(self.levels) for value in level)
+        if not items:
+            return [0 for _ in qs]
+        weights = list(accumulate(weight for _, weight in items))
+        return [items[min(bisect_left(weights, q * weights[-1]), len(items) - 1)][0] for q in qs]
+
+    def dump(self):
+        """Возвращает состояние скетча для сохранения в json
+
+        Returns:
+            dict: Состояние скетча
+        """
+        return {'k': self.k, 'levels': self.levels, 'count': self.count, 'flip': self.flip}
+
+    @staticmethod
+    def load(state):
+        """Восстанавливает скетч из сохранённого состояния
+
+        Args:
+            state (dict): Состояние скетча
+
+        Returns:
+            Sketch: Скетч
+        """
+        sketch = Sketch(state['k'])
+        while len(sketch.levels) < len(state['levels']):
+            sketch.grow()
+        sketch.levels = state['levels']
+        sketch.size = sum(len(x) for x in sketch.levels)
+        sketch.count = state['count']
+        sketch.flip = state['flip']
+        return sketch
+
+
+class Cube:
+    """Куб агрегатов: суммы средних зарплат и количества вакансий по годам, месяцам, городам, опыту работы,
+    группам профессий и валютам. Строится за один проход по вакансиям и сохраняется рядом с файлом, после чего любые
+    срезы и свёртки считаются по ячейкам куба без чтения вакансий. Зарплаты ячеек хранятся в валюте вакансии
+    и переводятся в рубли по курсу месяца при свёртке. Для процентилей рядом с ячейками хранятся скетчи зарплат
+    в рублях по годам, городам и годам групп профессий, они посчитаны по курсам rates, и при смене курсов
+    куб строится заново
+
+    Attributes:
+        prof_names (list): Названия профессий, вакансия попадает в группу профессии, если её название содержит его
+        cells (dict): Ячейки куба: (год, месяц, город, опыт, маска групп профессий, валюта) ->
+            [сумма зарплат, количество]
+        rates (str): Хэш таблицы курсов, по которой посчитаны скетчи
+        year_sketches (dict): Скетчи зарплат по годам
+        city_sketches (dict): Скетчи зарплат по городам
+        prof_sketches (list): Скетчи зарплат по годам для каждой профессии из prof_names
+        postings (dict): Индекс ячеек: (номер измерения, значение) -> ключи ячеек, строится при первой свёртке
+        rollups (dict): Запомненные результаты свёрток
+    """
+    dimensions = ('year', 'month', 'city', 'experience', 'profs', 'currency')
+
+    def __init__(self, prof_names=(), vacancies=()):
+        """Инициализирует объект Cube
+
+        Args:
+            prof_names (list): Названия профессий
+            vacancies: Итератор вакансий
+        """
+        self.prof_names = list(prof_names)
+        self.cells = {}
+        self.postings = None
+        self.rollups = {}
+        self.rates = Rates.get().key
+        self.year_sketches = {}
+        self.city_sketches = {}
+        self.prof_sketches = [{} for _ in self.prof_names]
+        automaton = Automaton(self.prof_names) if self.prof_names else None
+        masks = {}
+        for vac in vacancies:
+            if vac.name not in masks:
+                masks[vac.name] = sum(1 << i for i in automaton.find(vac.name)) if automaton else 0
+            mask = masks[vac.name]
+            key = (vac.year, vac.published // 10 ** 8, vac.area_name, getattr(vac, 'raw_experience_id', ''),
+                   mask, vac.salary_currency)
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = [0, 0]
+            cell[0] += (vac.salary_from + vac.salary_to) / 2
+            cell[1] += 1
+            self.sketch(self.year_sketches, vac.year).add(vac.salary)
+            self.sketch(self.city_sketches, vac.area_name).add(vac.salary)
+            for i, sketches in enumerate(self.prof_sketches):
+                if mask >> i & 1:
+                    self.sketch(sketches, vac.year).add(vac.salary)
+
+    @staticmethod
+    def sketch(sketches, key):
+        """Возвращает скетч группы, создавая его при первом обращении
+
+        Args:
+            sketches (dict): Скетчи по группам
+            key: Группа
+
+        Returns:
+            Sketch: Скетч группы
+        """
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = Sketch()
+        return sketch
+
+    def get_postings(self):
+        """Возвращает индекс ячеек по значениям измерений, для групп профессий - по номеру бита маски
+
+        Returns:
+            dict: (номер измерения, значение) -> ключи ячеек в порядке их появления
+        """
+        if self.postings is None:
+            self.postings = {}
+            for key in self.cells:
+                for i, value in enumerate(key):
+                    if i != 4:
+                        self.postings.setdefault((i, value), []).append(key)
+                for j in range(len(self.prof_names)):
+                    if key[4] >> j & 1:
+                        self.postings.setdefault((4, 1 << j), []).append(key)
+        return self.postings
+
+    def rollup(self, by=(), **where):
+        """Сворачивает куб по измерениям by, учитывая только ячейки с заданными значениями измерений.
+        Перебираются только ячейки из самого короткого списка индекса, результаты свёрток запоминаются
+
+        Args:
+            by (tuple): Измерения, по которым группируется результат ('year', 'month', 'city', 'experience',
+                'currency')
+            where: Значения измерений year, month, city, experience, currency и название профессии prof
+
+        Returns:
+            dict: Значение измерения (или кортеж значений, если измерений несколько) -> [сумма зарплат в рублях,
+                количество вакансий], группы идут в порядке первого появления в файле
+        """
+        rates = Rates.get()
+        name = (rates.key, tuple(by), tuple(sorted(where.items())))
+        if name in self.rollups:
+            return self.rollups[name]
+        positions = [self.dimensions.index(x) for x in by]
+        conditions = [(4, 1 << self.prof_names.index(value)) if x == 'prof' else (self.dimensions.index(x), value)
+                      for x, value in where.items()]
+        keys = min((self.get_postings().get(x, ()) for x in conditions), key=len) if conditions else self.cells
+        result = {}
+        for key in keys:
+            if any(not key[4] & value if i == 4 else key[i] != value for i, value in conditions):
+                continue
+            group = key[positions[0]] if len(positions) == 1 else tuple(key[i] for i in positions)
+            total, amount = self.cells[key]
+            cell = result.get(group)
+            if cell is None:
+                cell = result[group] = [0, 0]
+            cell[0] += total * rates.rate(key[5], key[1])
+            cell[1] += amount
+        self.rollups[name] = result
+        return result
+
+    def save(self, path, source):
+        """Сохраняет куб в json файл
+
+        Args:
+            path (str): Путь к файлу
+            source (dict): Отпечаток исходного файла
+        """
+        data = {'version': cube_version, 'source': source, 'prof_names': self.prof_names, 'rates': self.rates,
+                'cells': [list(key) + cell for key, cell in self.cells.items()],
+                'sketches': [[[key, sketch.dump()] for key, sketch in sketches.items()]
+                             for sketches in [self.year_sketches, self.city_sketches] + self.prof_sketches]}
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(f'{path}.tmp', path)
+
+    @staticmethod
+    def load(data):
+        """Восстанавливает куб из содержимого json файла
+
+        Args:
+            data (dict): Содержимое файла куба
+
+        Returns:
+            Cube: Куб
+        """
+        cube = Cube(data['prof_names'])
+        cube.cells = {tuple(cell[:6]): cell[6:] for cell in data['cells']}
+        cube.rates = data['rates']
+        sketches = [{key: Sketch.load(state) for key, state in saved} for saved in data['sketches']]
+        cube.year_sketches, cube.city_sketches, cube.prof_sketches = sketches[0], sketches[1], sketches[2:]
+        return cube
+
+
+class DataSet:
+    """Класс для подсчётов данных
+
+    Attributes:
+        file_name (str): Название файла
+        mode (str): Режим загрузки ('list' - список вакансий в памяти, 'stream' - потоковое чтение файла,
+            'parallel' - параллельная обработка частей файла, 'columns' - колоночное хранилище,
+            'incremental' - обработка только дописанного с прошлого запуска хвоста файла,
+            'cube' - статистика по годам, месяцам и городам из сохранённого куба агрегатов,
+            'mmap' - отображённый в память файл, вакансии разбираются при обращении к ним,
+            'partitioned' - файл, разбитый на части по годам, читаются только части, подходящие под фильтр)
+        processes (int): Количество процессов для режима 'parallel'
+        cache (bool): Использовать ли кэш разобранного файла в режимах 'list' и 'columns'
+        vacancies_objects (list): Список вакансий (в режиме 'mmap' - последовательность Rows)
+        columns (Columns): Колоночное хранилище вакансий для режима 'columns'
+        index (Index): Индексы для фильтров таблицы, если построены
+        cube (Cube): Куб агрегатов для режима 'cube'
+        query (Query): Фильтр вакансий для режима 'partitioned'
+        partitions (list): Описания частей файла, подходящих под фильтр, для режима 'partitioned'
+        vac_amount (int): Количество вакансий
+        sal_by_years (dict): Зарплата по годам
+        sal_by_years_for_prof (dict): Зарплата по годам для конкретной профессии
+        sal_by_city (dict): Зарплата по городам
+        amount_by_years (dict): Количество вакансий по годам
+        amount_prof_by_years (dict): Количество вакансий по годам для конкретной профессии
+        amount_by_city (dict): Количество вакансий по городам
+        sal_by_months (dict): Зарплата по месяцам, месяц - число вида ГГГГММ
+        amount_by_months (dict): Количество вакансий по месяцам
+        sal_by_months_for_prof (dict): Зарплата по месяцам для конкретной профессии
+        amount_prof_by_months (dict): Количество вакансий по месяцам для конкретной профессии
+        sal_quantiles_by_years (dict): 10-й процентиль, медиана и 90-й процентиль зарплаты по годам
+            (до подсчёта - скетчи Sketch)
+        sal_quantiles_by_years_for_prof (dict): Процентили зарплаты по годам для конкретной профессии
+        sal_quantiles_by_city (dict): Процентили зарплаты по городам
+    """
+
+    def __init__(self, f_name, mode='list', processes=None, cache=True, columns=None, query=None):
+        """Инициализирует объект DataSet
+
+        Args:
+            f_name (str): Название файла
+            mode (str): Режим загрузки. В режимах 'stream' и 'parallel' файл не загружается в память,
+                а читается при вызове make. В режиме 'columns' вакансии хранятся в виде массивов NumPy.
+                В режиме 'incremental' make читает только новые строки, остальное берёт из файла состояния.
+                В режиме 'cube' make считает статистику по годам, месяцам и городам по кубу агрегатов.
+                В режиме 'mmap' файл отображается в память, а вакансии разбираются только при обращении к ним.
+                В режиме 'partitioned' файл один раз разбивается на части по годам, а make читает и параллельно
+                обрабатывает только части, которые могут содержать подходящие под фильтр вакансии
+            processes (int): Количество процессов для режимов 'parallel' и 'partitioned', по умолчанию - количество ядер
+            cache (bool): Использовать ли кэш разобранного файла. Кэш создаётся рядом с файлом
+                при первом чтении и пересоздаётся, если файл изменился
+            columns (Columns): Уже загруженное колоночное хранилище файла для режимов 'list' и 'columns',
+                если задано - файл не читается
+            query: Фильтр вакансий (Query или его текст) для режима 'partitioned', статистика считается только
+                по подходящим вакансиям
+        """
+        self.file_name = f_name
+        self.mode = mode
+        self.processes = processes or os.cpu_count()
+        self.cache = cache
+        self.vacancies_objects = []
+        self.columns = columns
+        self.index = None
+        self.cube = None
+        self.query = Query(query) if isinstance(query, str) else query
+        self.partitions = []
+        with Metrics.stage('read'):
+            if columns is None and mode in ('list', 'columns') and cache:
+                self.columns = self.load_columns(self.file_name)
+            elif columns is None and mode == 'columns':
+                self.columns = Columns(self.CSV_reader(self.file_name))
+            if mode == 'list':
+                vacancy = Metrics.timed('Vacancy', Vacancy)
+                self.vacancies_objects = [vacancy(obj) for obj in self.columns.rows()] if self.columns is not None \
+                    else [vacancy(obj) for obj in self.CSV_reader(self.file_name)]
+                self.columns = None
+            elif mode == 'mmap':
+                self.vacancies_objects = self.load_rows(self.file_name)
+            elif mode == 'partitioned':
+                self.partitions = [part for part in self.load_partitions(self.file_name)['parts']
+                                   if self.query is None or self.query.may_match(part)]
+        self.vac_amount = len(self.vacancies_objects)
+        self.sal_by_years = {}
+        self.sal_by_years_for_prof = {}
+        self.sal_by_city = {}
+        self.amount_by_years = {}
+        self.amount_prof_by_years = {}
+        self.amount_by_city = {}
+        self.sal_by_months = {}
+        self.amount_by_months = {}
+        self.sal_by_months_for_prof = {}
+        self.amount_prof_by_months = {}
+        self.sal_quantiles_by_years = {}
+        self.sal_quantiles_by_years_for_prof = {}
+        self.sal_quantiles_by_city = {}
+
+    @staticmethod
+    def strRefactor(str):
+        """Форматируют строку, убирая HTML теги и затирая лишнии пробелы
+
+        Args:
+            str: Строка для форматирования
+
+        Returns:
+            str: Готовая строка
+        """
+        str = html_tags.sub('', str)
+        str = str.replace('\n', '_')
+        str = ' '.join(str.split())
+        return str
+
+    @staticmethod
+    def clean_text(str):
+        """Форматирует короткую текстовую строку. Строки без HTML тегов и лишних пробелов возвращаются без изменений
+
+        Args:
+            str: Строка для форматирования
+
+        Returns:
+            str: Готовая строка
+        """
+        if '<' not in str and str.isprintable() and '  ' not in str and str[:1] != ' ' and str[-1:] != ' ':
+            return str
+        return DataSet.strRefactor(str)
+
+    @staticmethod
+    def get_cleaners(titles, heavy=()):
+        """Подбирает функцию форматирования для каждого столбца: числа, даты и коды только очищаются от пробелов
+        по краям, описание и навыки не форматируются (если не указаны в heavy), остальные столбцы проходят
+        через clean_text
+
+        Args:
+            titles (list): Названия столбцов
+            heavy (tuple): Столбцы из lazy_columns, которые нужно полностью отформатировать при чтении
+
+        Returns:
+            list: Функции форматирования для столбцов (str - значение остаётся без изменений)
+        """
+        cleaners = []
+        str_refactor = Metrics.timed('strRefactor', DataSet.strRefactor)
+        clean_text = Metrics.timed('clean_text', DataSet.clean_text)
+        for title in titles:
+            if title in heavy:
+                cleaners.append(str_refactor)
+            elif title in lazy_columns:
+                cleaners.append(str)
+            elif title in plain_columns:
+                cleaners.append(str.strip)
+            else:
+                cleaners.append(clean_text)
+        return cleaners
+
+    @staticmethod
+    def CSV_reader(csv_file, start=None, end=None, heavy=()):
+        """Потоковый парсер для csv файлов, читает файл построчно и не держит его в памяти
+
+        Args:
+            csv_file: csv файл
+            start (int): Байтовое смещение начала читаемой части файла (начало строки)
+            end (int): Байтовое смещение конца читаемой части файла
+            heavy (tuple): Столбцы из lazy_columns, которые нужно полностью отформатировать при чтении
+
+        Yields:
+            dict: Словарь одной вакансии, где ключи - это названия параметров(название, опыт),
+             а значения - это соответсвующие значения для параметров
+        """
+        if start is None:
+            with open(csv_file, encoding='utf-8-sig') as file:
+                yield from DataSet.rows_filter(csv.reader(file), heavy=heavy)
+            return
+        with open(csv_file, 'rb') as file:
+            titles = next(csv.reader([file.readline().decode('utf-8-sig')]))
+            file.seek(start)
+            yield from DataSet.rows_filter(csv.reader(DataSet.lines_reader(file, end)), titles, heavy)
+
+    @staticmethod
+    def rows_filter(csv_reader, titles=None, heavy=()):
+        """Отбрасывает неполные строки и форматирует значения. Если включён сбор Metrics, считает прочитанные,
+        оставленные и отброшенные строки: 'rows_dropped_columns' - неверное количество значений,
+        'rows_dropped_empty' - пустые значения
+
+        Args:
+            csv_reader: Итератор строк csv файла
+            titles (list): Названия столбцов, если None - берутся из первой строки
+            heavy (tuple): Столбцы из lazy_columns, которые нужно полностью отформатировать при чтении
+
+        Yields:
+            dict: Словарь одной вакансии
+        """
+        if titles is None:
+            titles = next(csv_reader)
+        cleaners = DataSet.get_cleaners(titles, heavy)
+        metrics = Metrics.active
+        if metrics is None:
+            for x in csv_reader:
+                if '' not in x and len(x) == len(titles):
+                    yield {title: clean(s) for title, clean, s in zip(titles, cleaners, x)}
+            return
+        read = broken = empty = 0
+        try:
+            for x in csv_reader:
+                read += 1
+                if len(x) != len(titles):
+                    broken += 1
+                elif '' in x:
+                    empty += 1
+                else:
+                    yield {title: clean(s) for title, clean, s in zip(titles, cleaners, x)}
+        finally:
+            metrics.count('rows_read', read)
+            metrics.count('rows_kept', read - broken - empty)
+            metrics.count('rows_dropped_columns', broken)
+            metrics.count('rows_dropped_empty', empty)
+
+    @staticmethod
+    def lines_reader(file, end):
+        """Читает строки бинарного файла до заданного смещения
+
+        Args:
+            file: Файл, открытый в бинарном режиме
+            end (int): Байтовое смещение, на котором чтение прекращается
+
+        Yields:
+            str: Строка файла
+        """
+        pos = file.tell()
+        while pos < end:
+            line = file.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line.decode('utf-8').replace('\r\n', '\n')
+
+    @staticmethod
+    def CSV_chunks(csv_file, parts):
+        """Делит csv файл на части по границам записей.
+        Граница записи - перевод строки, перед которым чётное количество кавычек,
+        поэтому многострочные значения в кавычках не разрезаются
+
+        Args:
+            csv_file: csv файл
+            parts (int): Желаемое количество частей
+
+        Returns:
+            list: Список пар (начало, конец) байтовых смещений частей
+        """
+        size = os.path.getsize(csv_file)
+        with open(csv_file, 'rb') as file:
+            pos = len(file.readline())
+            bounds = [pos]
+            quotes = 0
+            for i in range(1, parts):
+                target = max(size * i // parts, pos)
+                quotes += file.read(target - pos).count(b'"')
+                pos = target
+                while True:
+                    line = file.readline()
+                    if not line:
+                        break
+                    pos += len(line)
+                    quotes += line.count(b'"')
+                    if quotes % 2 == 0:
+                        break
+                if pos > bounds[-1]:
+                    bounds.append(pos)
+        if size > bounds[-1]:
+            bounds.append(size)
+        return list(zip(bounds, bounds[1:]))
+
+    @staticmethod
+    def CSV_parser(csv_file):
+        """Парсер для csv файлов
+
+        Args:
+            csv_file: csv файл
+
+        Returns:
+            vacancies (list): Список словарей вакансий, где первые ключи - это названия параметров(название, опыт),
+             а значения - это соответсвующие значения для параметров
+        """
+        return list(DataSet.CSV_reader(csv_file, heavy=lazy_columns))
+
+    @staticmethod
+    def file_hash(csv_file):
+        """Считает хэш содержимого файла
+
+        Args:
+            csv_file: csv файл
+
+        Returns:
+            str: Хэш blake2b в шестнадцатеричном виде
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(csv_file, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def fingerprint(csv_file):
+        """Создаёт отпечаток файла: путь, размер, время изменения и хэш содержимого
+
+        Args:
+            csv_file: csv файл
+
+        Returns:
+            dict: Отпечаток файла
+        """
+        stat = os.stat(csv_file)
+        return {'path': os.path.abspath(csv_file), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                'hash': DataSet.file_hash(csv_file)}
+
+    @staticmethod
+    def is_actual(csv_file, source):
+        """Проверяет, что кэш создан по текущей версии файла.
+        Хэш содержимого пересчитывается, только если совпал размер, но изменилось время изменения файла.
+        Если при этом хэш совпал, новое время изменения записывается в source, и его нужно сохранить
+        вместе с кэшем, чтобы не пересчитывать хэш при каждой загрузке
+
+        Args:
+            csv_file: csv файл
+            source (dict): Отпечаток файла, сохранённый в кэше
+
+        Returns:
+            bool: Действителен ли кэш
+        """
+        stat = os.stat(csv_file)
+        if source['path'] != os.path.abspath(csv_file) or source['size'] != stat.st_size:
+            return False
+        if source['mtime'] == stat.st_mtime_ns:
+            return True
+        if source['hash'] != DataSet.file_hash(csv_file):
+            return False
+        source['mtime'] = stat.st_mtime_ns
+        return True
+
+    @staticmethod
+    def load_columns(csv_file):
+        """Загружает разобранный файл из кэша или разбирает файл и сохраняет кэш
+
+        Args:
+            csv_file: csv файл
+
+        Returns:
+            Columns: Колоночное хранилище всех вакансий файла
+        """
+        folder = f'{csv_file}.cache'
+        try:
+            with open(os.path.join(folder, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+            mtime = meta['source']['mtime']
+            if meta['version'] == cache_version and DataSet.is_actual(csv_file, meta['source']):
+                if meta['source']['mtime'] != mtime:
+                    write_json(os.path.join(folder, 'meta.json'), meta)
+                return Columns.load(folder, meta)
+        except (OSError, ValueError, KeyError):
+            pass
+        source = DataSet.fingerprint(csv_file)
+        temp = Columns.temp_folder(folder)
+        shutil.rmtree(temp, ignore_errors=True)
+        try:
+            os.makedirs(temp)
+        except OSError:
+            return Columns(DataSet.CSV_reader(csv_file, heavy=lazy_columns), Columns.texts)
+        try:
+            columns = Columns(DataSet.CSV_reader(csv_file, heavy=lazy_columns), Columns.texts, temp)
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+        try:
+            columns.save(folder, source)
+        except OSError:
+            shutil.rmtree(temp, ignore_errors=True)
+        return columns
+
+    @staticmethod
+    def load_rows(csv_file):
+        """Загружает смещения записей файла или находит их и сохраняет рядом с файлом
+
+        Args:
+            csv_file: csv файл
+
+        Returns:
+            Rows: Последовательность вакансий файла
+        """
+        path = f'{csv_file}.rows'
+        try:
+            rows = Rows.load(csv_file, path)
+            if rows is not None:
+                return rows
+        except (OSError, ValueError, KeyError, EOFError):
+            pass
+        source = DataSet.fingerprint(csv_file)
+        rows = Rows(csv_file, *Rows.scan(csv_file))
+        try:
+            rows.save(path, source)
+        except OSError:
+            pass
+        return rows
+
+    @staticmethod
+    def load_partitions(csv_file, by_region=None):
+        """Загружает описание частей файла или разбивает файл на части по годам публикации (и по регионам)
+        и сохраняет их рядом с файлом. Каждая часть - колоночное хранилище в своей папке вместе с номерами
+        её вакансий в исходном файле, а в общем meta.json для каждой части хранятся диапазоны дат публикации
+        и окладов и список регионов, по которым части отбрасываются до чтения
+
+        Args:
+            csv_file: csv файл
+            by_region (bool): Разбивать ли годы ещё и по регионам, None - подходит любое сохранённое разбиение,
+                а если его нет - только по годам
+
+        Returns:
+            dict: Описание частей, части идут в порядке первой вакансии в файле
+        """
+        import numpy as np
+        folder = f'{csv_file}.parts'
+        try:
+            with open(os.path.join(folder, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+            mtime = meta['source']['mtime']
+            if meta['version'] == parts_version and DataSet.is_actual(csv_file, meta['source']) \
+                    and by_region in (None, meta['by_region']):
+                if meta['source']['mtime'] != mtime:
+                    write_json(os.path.join(folder, 'meta.json'), meta)
+                return meta
+        except (OSError, ValueError, KeyError):
+            pass
+        source = DataSet.fingerprint(csv_file)
+        columns = DataSet.load_columns(csv_file)
+        keys = np.asarray(columns.year, dtype=np.int64)
+        if by_region:
+            keys = keys * len(columns.values['area_name']) + columns.codes['area_name']
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(first))).tolist()
+        meta = {'version': parts_version, 'source': source, 'by_region': bool(by_region), 'parts': []}
+        temp = f'{folder}.tmp{os.getpid()}'
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        try:
+            for i, (start, end) in enumerate(zip([0] + bounds, bounds)):
+                ids = order[start:end]
+                part = columns.select(ids)
+                name = str(i)
+                part.save(os.path.join(temp, name), source)
+                np.save(os.path.join(temp, name, 'rows.npy'), ids)
+                meta['parts'].append({'name': name, 'year': int(part.year[0]),
+                                      'region': part.values['area_name'][0] if by_region else None,
+                                      'rows': len(part), 'first': int(ids[0]),
+                                      'published': [int(part.published.min()), int(part.published.max())],
+                                      'salary': [float(part.salary_from.min()), float(part.salary_to.max())],
+                                      'regions': part.values['area_name']})
+            meta['parts'].sort(key=lambda part: part['first'])
+            write_json(os.path.join(temp, 'meta.json'), meta)
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+        replace_folder(temp, folder)
+        return meta
+
+    def read_partition(self, part):
+        """Загружает часть файла и отбирает её вакансии, подходящие под фильтр
+
+        Args:
+            part (dict): Описание части
+
+        Returns:
+            tuple: Колоночное хранилище подходящих вакансий части и их номера в исходном файле
+        """
+        import numpy as np
+        folder = os.path.join(f'{self.file_name}.parts', part['name'])
+        with open(os.path.join(folder, 'meta.json'), encoding='utf-8') as file:
+            columns = Columns.load(folder, json.load(file))
+        rows = np.load(os.path.join(folder, 'rows.npy'), mmap_mode='r')
+        if self.query is not None:
+            mask = self.query.mask(columns)
+            if not mask.all():
+                ids = np.flatnonzero(mask)
+                return columns.select(ids), rows[ids]
+        return columns, rows
+
+    @staticmethod
+    def load_cube(csv_file, prof_names=()):
+        """Загружает куб агрегатов или строит его по файлу и сохраняет. Если в сохранённом кубе нет нужных профессий
+        или его скетчи посчитаны по другим курсам, куб строится заново для прежних и новых профессий
+
+        Args:
+            csv_file: csv файл
+            prof_names (list): Названия профессий, которые должны быть в кубе
+
+        Returns:
+            Cube: Куб агрегатов
+        """
+        path = f'{csv_file}.cube.json'
+        saved = []
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+            mtime = data['source']['mtime']
+            if data['version'] == cube_version and DataSet.is_actual(csv_file, data['source']):
+                saved = data['prof_names']
+                if all(prof_name in saved for prof_name in prof_names) and data['rates'] == Rates.get().key:
+                    if data['source']['mtime'] != mtime:
+                        write_json(path, data)
+                    return Cube.load(data)
+        except (OSError, ValueError, KeyError):
+            pass
+        source = DataSet.fingerprint(csv_file)
+        cube = Cube(saved + [x for x in prof_names if x not in saved], DataSet(csv_file, 'stream').get_vacancies())
+        try:
+            cube.save(path, source)
+        except OSError:
+            pass
+        return cube
+
+    def make_cube(self, prof_name):
+        """Заполняет суммы и количества по годам, месяцам и городам свёртками куба агрегатов,
+        а скетчи процентилей - сохранёнными в кубе скетчами
+
+        Args:
+            prof_name (str): Название профессии для статистики, None - без статистики по профессии
+        """
+        self.cube = self.load_cube(self.file_name, [] if prof_name is None else [prof_name])
+        for year, (total, amount) in self.cube.rollup(('year',)).items():
+            self.sal_by_years[year] = total
+            self.amount_by_years[year] = amount
+        prof = {} if prof_name is None else self.cube.rollup(('year',), prof=prof_name)
+        for year in self.sal_by_years:
+            self.sal_by_years_for_prof[year], self.amount_prof_by_years[year] = prof.get(year, (0, 0))
+        for month, (total, amount) in self.cube.rollup(('month',)).items():
+            self.sal_by_months[month] = total
+            self.amount_by_months[month] = amount
+        prof = {} if prof_name is None else self.cube.rollup(('month',), prof=prof_name)
+        for month in self.sal_by_months:
+            self.sal_by_months_for_prof[month], self.amount_prof_by_months[month] = prof.get(month, (0, 0))
+        for city, (total, amount) in self.cube.rollup(('city',)).items():
+            self.sal_by_city[city] = total
+            self.amount_by_city[city] = amount
+        sketches = {} if prof_name is None else self.cube.prof_sketches[self.cube.prof_names.index(prof_name)]
+        self.sal_quantiles_by_years = dict(self.cube.year_sketches)
+        self.sal_quantiles_by_years_for_prof = {year: sketches.get(year, Sketch()) for year in self.sal_by_years}
+        self.sal_quantiles_by_city = dict(self.cube.city_sketches)
+
+    def make_index(self):
+        """Строит индексы для фильтров таблицы по списку вакансий"""
+        self.index = Index(self.vacancies_objects)
+
+    def get_vacancies(self):
+        """Возвращает вакансии в зависимости от режима загрузки
+
+        Returns:
+            Список вакансий или генератор, создающий вакансии по мере чтения файла
+        """
+        if self.mode in ('list', 'mmap'):
+            return self.vacancies_objects
+        if self.mode == 'partitioned':
+            return self.get_partition_vacancies()
+        vacancy = Metrics.timed('Vacancy', Vacancy)
+        return (vacancy(obj) for obj in self.CSV_reader(self.file_name))
+
+    def get_partition_vacancies(self):
+        """Собирает подходящие под фильтр вакансии частей файла в порядке исходного файла
+
+        Returns:
+            list: Список вакансий
+        """
+        rows = []
+        vacancies = []
+        for part in self.partitions:
+            columns, ids = self.read_partition(part)
+            rows.extend(ids.tolist())
+            vacancies.extend(Vacancy(obj) for obj in columns.rows())
+        return [vacancies[i] for i in sorted(range(len(rows)), key=rows.__getitem__)]
+
+    @staticmethod
+    def year_counter(sal, amount):
+        """Подсчитывает среднию зарпалту за год(делит зарплату на количество вакансий в году)
+
+        Args:
+            sal (dict): Словарь зарплат
+            amount (dict): Словарь количества зарплат
+        """
+        for key in sal:
+            sal[key] = int(sal[key] / amount[key]) if amount[key] != 0 else 0
+
+    @staticmethod
+    def quantile_counter(sketches):
+        """Заменяет скетчи зарплат на 10-й процентиль, медиану и 90-й процентиль
+
+        Args:
+            sketches (dict): Словарь скетчей
+        """
+        for key in sketches:
+            sketches[key] = [int(x) for x in sketches[key].quantiles(quantiles)]
+
+    def city_counter(self, sal, amount):
+        """Подсчитывает среднию зарпалту по городам(делит зарплату на количество вакансий в городе)
+
+        Args:
+            sal (dict): Словарь зарплат
+            amount (dict): Словарь количества зарплат
+        """
+        lst = []
+        for key in sal:
+            sal[key] = int(sal[key] / amount[key]) if amount[key] != 0 else 0
+            amount[key] = round(amount[key] / self.vac_amount, 4) if self.vac_amount != 0 else 0
+            if amount[key] < 0.01:
+                lst.append(key)
+        for key in lst:
+            del sal[key]
+            del amount[key]
+
+    def add(self, vac, prof_name):
+        """Добавляет одну вакансию к суммам зарплат и количествам вакансий по годам, месяцам и городам
+
+        Args:
+            vac (Vacancy): Вакансия
+            prof_name (str): Название профессии для статистики, None - без статистики по профессии
+        """
+        city = vac.area_name
+        year = vac.published // 10 ** 10
+        month = vac.published // 10 ** 8
+        if city not in self.sal_by_city:
+            self.sal_by_city[city] = 0
+            self.amount_by_city[city] = 0
+            self.sal_quantiles_by_city[city] = Sketch()
+        if year not in self.sal_by_years:
+            self.sal_by_years[year] = 0
+            self.amount_by_years[year] = 0
+            self.sal_by_years_for_prof[year] = 0
+            self.amount_prof_by_years[year] = 0
+            self.sal_quantiles_by_years[year] = Sketch()
+            self.sal_quantiles_by_years_for_prof[year] = Sketch()
+        if month not in self.sal_by_months:
+            self.sal_by_months[month] = 0
+            self.amount_by_months[month] = 0
+            self.sal_by_months_for_prof[month] = 0
+            self.amount_prof_by_months[month] = 0
+        if prof_name is not None and vac.name.find(prof_name) >= 0:
+            self.sal_by_years_for_prof[year] += vac.salary
+            self.amount_prof_by_years[year] += 1
+            self.sal_by_months_for_prof[month] += vac.salary
+            self.amount_prof_by_months[month] += 1
+            self.sal_quantiles_by_years_for_prof[year].add(vac.salary)
+
+        self.sal_quantiles_by_city[city].add(vac.salary)
+        self.sal_quantiles_by_years[year].add(vac.salary)
+        self.sal_by_city[city] += vac.salary
+        self.amount_by_city[city] += 1
+        self.sal_by_years[year] += vac.salary
+        self.amount_by_years[year] += 1
+        self.sal_by_months[month] += vac.salary
+        self.amount_by_months[month] += 1
+
+    def add_columns(self, columns, prof_name):
+        """Добавляет к суммам и количествам данные колоночного хранилища.
+        Суммы по годам, месяцам и городам считаются через np.bincount, без цикла по вакансиям
+
+        Args:
+            columns (Columns): Колоночное хранилище вакансий
+            prof_name (str): Название профессии для статистики, None - без статистики по профессии
+        """
+        import numpy as np
+        if prof_name is None:
+            prof = np.zeros(len(columns), dtype=bool)
+        else:
+            prof = columns.match('name', lambda name: name.find(prof_name) >= 0)
+        self.add_periods(columns, 'year', self.sal_by_years, self.amount_by_years)
+        self.add_periods(columns, 'year', self.sal_by_years_for_prof, self.amount_prof_by_years, prof)
+        self.add_periods(columns, 'month', self.sal_by_months, self.amount_by_months)
+        self.add_periods(columns, 'month', self.sal_by_months_for_prof, self.amount_prof_by_months, prof)
+
+        salary = columns.salary
+        cities = columns.codes['area_name']
+        sal_by_city = np.bincount(cities, weights=salary, minlength=len(columns.values['area_name']))
+        amount_by_city = np.bincount(cities, minlength=len(columns.values['area_name']))
+        for code, city in enumerate(columns.values['area_name']):
+            self.sal_by_city[city] = self.sal_by_city.get(city, 0) + sal_by_city[code].item()
+            self.amount_by_city[city] = self.amount_by_city.get(city, 0) + amount_by_city[code].item()
+
+        years, year_codes = columns.group('year')
+        self.add_sketches(years, year_codes, salary, self.sal_quantiles_by_years)
+        self.add_sketches(years, year_codes, salary, self.sal_quantiles_by_years_for_prof, prof)
+        self.add_sketches(columns.values['area_name'], cities, salary, self.sal_quantiles_by_city)
+
+    @staticmethod
+    def add_sketches(keys, codes, salary, sketches, mask=None):
+        """Добавляет зарплаты в скетчи групп, зарплаты каждой группы добавляются одним списком
+
+        Args:
+            keys (list): Названия групп, индекс названия - код группы
+            codes (np.ndarray): Код группы для каждой вакансии
+            salary (np.ndarray): Зарплата для каждой вакансии
+            sketches (dict): Скетчи по группам
+            mask (np.ndarray): Маска учитываемых вакансий, по умолчанию - все вакансии
+        """
+        import numpy as np
+        if mask is not None:
+            codes = codes[mask]
+            salary = salary[mask]
+        order = np.argsort(codes, kind='stable')
+        values = salary[order].tolist()
+        bounds = np.cumsum(np.bincount(codes, minlength=len(keys))).tolist()
+        for key, start, end in zip(keys, [0] + bounds, bounds):
+            if key not in sketches:
+                sketches[key] = Sketch()
+            sketches[key].extend(values[start:end])
+
+    @staticmethod
+    def add_periods(columns, period, sal, amount, mask=None):
+        """Добавляет суммы зарплат и количества вакансий по годам или месяцам через np.bincount
+
+        Args:
+            columns (Columns): Колоночное хранилище вакансий
+            period (str): 'year' - по годам, 'month' - по месяцам
+            sal (dict): Словарь зарплат
+            amount (dict): Словарь количества зарплат
+            mask (np.ndarray): Маска учитываемых вакансий, по умолчанию - все вакансии
+        """
+        import numpy as np
+        periods, codes = columns.group(period)
+        salary = columns.salary
+        if mask is not None:
+            codes = codes[mask]
+            salary = salary[mask]
+        sums = np.bincount(codes, weights=salary, minlength=len(periods))
+        counts = np.bincount(codes, minlength=len(periods))
+        for i, key in enumerate(periods):
+            sal[key] = sal.get(key, 0) + sums[i].item()
+            amount[key] = amount.get(key, 0) + counts[i].item()
+
+    @Metrics.stage('make')
+    def make_batch(self, prof_names):
+        """Считает статистику сразу для нескольких профессий за один проход по данным.
+        Названия вакансий сверяются со всеми профессиями автоматом Ахо-Корасик, общая статистика
+        по годам и городам считается один раз
+
+        Args:
+            prof_names (list): Названия профессий
+
+        Returns:
+            dict: Объекты DataSet с готовой статистикой для каждой профессии
+        """
+        import numpy as np
+        automaton = Automaton(prof_names)
+        parts = [DataSet(self.file_name, 'stream') for _ in prof_names]
+        if self.mode == 'columns':
+            self.add_columns(self.columns, None)
+            names = self.columns.values['name']
+            matched = [np.zeros(len(names), dtype=bool) for _ in prof_names]
+            for code, name in enumerate(names):
+                for i in automaton.find(name):
+                    matched[i][code] = True
+            for part, mask in zip(parts, matched):
+                mask = mask[self.columns.codes['name']]
+                self.add_periods(self.columns, 'year', part.sal_by_years_for_prof, part.amount_prof_by_years, mask)
+                self.add_periods(self.columns, 'month', part.sal_by_months_for_prof, part.amount_prof_by_months, mask)
+                self.add_sketches(*self.columns.group('year'), self.columns.salary,
+                                  part.sal_quantiles_by_years_for_prof, mask)
+        else:
+            found = {}
+            for vac in self.get_vacancies():
+                self.add(vac, None)
+                if vac.name not in found:
+                    found[vac.name] = automaton.find(vac.name)
+                year = vac.published // 10 ** 10
+                month = vac.published // 10 ** 8
+                for i in found[vac.name]:
+                    part = parts[i]
+                    part.sal_by_years_for_prof[year] = part.sal_by_years_for_prof.get(year, 0) + vac.salary
+                    part.amount_prof_by_years[year] = part.amount_prof_by_years.get(year, 0) + 1
+                    part.sal_by_months_for_prof[month] = part.sal_by_months_for_prof.get(month, 0) + vac.salary
+                    part.amount_prof_by_months[month] = part.amount_prof_by_months.get(month, 0) + 1
+                    if year not in part.sal_quantiles_by_years_for_prof:
+                        part.sal_quantiles_by_years_for_prof[year] = Sketch()
+                    part.sal_quantiles_by_years_for_prof[year].add(vac.salary)
+        self.count()
+        result = {}
+        for prof_name, part in zip(prof_names, parts):
+            part.sal_by_years_for_prof = {year: part.sal_by_years_for_prof.get(year, 0) for year in self.sal_by_years}
+            part.amount_prof_by_years = {year: part.amount_prof_by_years.get(year, 0) for year in self.sal_by_years}
+            part.sal_by_months_for_prof = {month: part.sal_by_months_for_prof.get(month, 0)
+                                           for month in self.sal_by_months}
+            part.amount_prof_by_months = {month: part.amount_prof_by_months.get(month, 0)
+                                          for month in self.sal_by_months}
+            part.sal_quantiles_by_years_for_prof = {year: part.sal_quantiles_by_years_for_prof.get(year, Sketch())
+                                                    for year in self.sal_by_years}
+            part.year_counter(part.sal_by_years_for_prof, part.amount_prof_by_years)
+            part.year_counter(part.sal_by_months_for_prof, part.amount_prof_by_months)
+            part.quantile_counter(part.sal_quantiles_by_years_for_prof)
+            part.sal_by_years = self.sal_by_years
+            part.amount_by_years = self.amount_by_years
+            part.sal_by_months = self.sal_by_months
+            part.amount_by_months = self.amount_by_months
+            part.sal_by_city = self.sal_by_city
+            part.amount_by_city = self.amount_by_city
+            part.sal_quantiles_by_years = self.sal_quantiles_by_years
+            part.sal_quantiles_by_city = self.sal_quantiles_by_city
+            part.vac_amount = self.vac_amount
+            result[prof_name] = part
+        return result
+
+    def get_sums(self):
+        """Возвращает словари сумм и количеств в постоянном порядке
+
+        Returns:
+            tuple: Словари зарплат и количеств по годам, по годам для профессии, по городам, по месяцам
+                и по месяцам для профессии
+        """
+        return (self.sal_by_years, self.amount_by_years, self.sal_by_years_for_prof, self.amount_prof_by_years,
+                self.sal_by_city, self.amount_by_city, self.sal_by_months, self.amount_by_months,
+                self.sal_by_months_for_prof, self.amount_prof_by_months)
+
+    def get_sketches(self):
+        """Возвращает словари скетчей зарплат в постоянном порядке
+
+        Returns:
+            tuple: Скетчи по годам, по годам для профессии и по городам
+        """
+        return self.sal_quantiles_by_years, self.sal_quantiles_by_years_for_prof, self.sal_quantiles_by_city
+
+    def merge(self, other):
+        """Добавляет к суммам, количествам и скетчам данные другого объекта DataSet
+        (например, посчитанные по части файла)
+
+        Args:
+            other (DataSet): Объект с ещё не усреднёнными суммами и количествами
+        """
+        for total, part in zip(self.get_sums(), other.get_sums()):
+            for key, value in part.items():
+                total[key] = total.get(key, 0) + value
+        for total, part in zip(self.get_sketches(), other.get_sketches()):
+            for key, sketch in part.items():
+                if key in total:
+                    total[key].merge(sketch)
+                else:
+                    total[key] = sketch
 
     @staticmethod
-    def strRefactor(str):
-        """Форматируют строку, убирая HTML теги и затирая лишнии пробелы
+    def records_end(csv_file, start):
+        """Находит конец последней полностью записанной строки файла, чтобы не читать недописанную запись.
+        Запись в конце файла без перевода строки считается полной, если все кавычки в ней закрыты
+        и в ней столько же значений, сколько столбцов в заголовке
 
         Args:
-            str: Строка для форматирования
+            csv_file: csv файл
+            start (int): Байтовое смещение, с которого начинается поиск (начало строки)
 
         Returns:
-            str: Готовая строка
+            int: Байтовое смещение конца последней полной записи
         """
-        str = re.sub(r"<[^>]*>", '', str)
-        str = str.replace('\n', '_')
-        str = ' '.join(str.split())
-        return str
+        with open(csv_file, 'rb') as file:
+            titles = next(csv.reader([file.readline().decode('utf-8-sig')]))
+            file.seek(start)
+            pos = end = start
+            quotes = 0
+            for line in file:
+                pos += len(line)
+                quotes += line.count(b'"')
+                if quotes % 2 == 0 and line.endswith(b'\n'):
+                    end = pos
+            if pos > end and quotes % 2 == 0:
+                file.seek(end)
+                records = list(csv.reader(io.StringIO(Rows.text(file.read(pos - end)), newline='')))
+                if len(records) == 1 and len(records[0]) == len(titles):
+                    end = pos
+        return end
 
     @staticmethod
-    def CSV_parser(csv_file):
-        """Парсер для csv файлов
+    def prefix_hash(csv_file, end, block=1 << 16):
+        """Считает хэш начала файла и блока перед смещением end, по нему проверяется,
+        что уже обработанная часть файла не изменилась
 
         Args:
             csv_file: csv файл
+            end (int): Байтовое смещение конца обработанной части
+            block (int): Размер проверяемых блоков
 
         Returns:
-            vacancies (list): Список словарей вакансий, где первые ключи - это названия параметров(название, опыт),
-             а значения - это соответсвующие значения для параметров
+            str: Хэш blake2b в шестнадцатеричном виде
         """
-        file = open(csv_file, encoding='utf-8-sig')
-        csv_reader = csv.reader(file)
-        titles = next(csv_reader)
-        vacancies = [dict(zip(titles, [DataSet.strRefactor(s) for s in x])) for x in csv_reader if
-                     '' not in x and len(x) == len(titles)]
-        return vacancies
+        digest = hashlib.blake2b(digest_size=16)
+        with open(csv_file, 'rb') as file:
+            digest.update(file.read(min(block, end)))
+            file.seek(max(end - block, 0))
+            digest.update(file.read(end - max(end - block, 0)))
+        return digest.hexdigest()
 
-    @staticmethod
-    def year_counter(sal, amount):
-        """Подсчитывает среднию зарпалту за год(делит зарплату на количество вакансий в году)
+    def load_state(self, prof_name, state_file):
+        """Загружает сохранённые суммы, количества и скетчи, если обработанная часть файла и курсы валют
+        не изменились
 
         Args:
-            sal (dict): Словарь зарплат
-            amount (dict): Словарь количества зарплат
+            prof_name (str): Название профессии для статистики
+            state_file (str): Файл состояния
+
+        Returns:
+            int: Байтовое смещение, до которого файл уже обработан
         """
-        for key in sal:
-            sal[key] = int(sal[key] / amount[key]) if amount[key] != 0 else 0
+        with open(self.file_name, 'rb') as file:
+            start = len(file.readline())
+        try:
+            with open(state_file, encoding='utf-8') as file:
+                state = json.load(file)
+            prof = state['profs'][prof_name]
+            if state['version'] != state_version or state.get('rates') != Rates.get().key \
+                    or prof['offset'] > os.path.getsize(self.file_name) \
+                    or prof['check'] != self.prefix_hash(self.file_name, prof['offset']):
+                return start
+        except (OSError, ValueError, KeyError):
+            return start
+        for total, saved in zip(self.get_sums(), prof['sums']):
+            for key, value in saved.items():
+                total[key] = value
+        sums = self.get_sums()
+        for periods in sums[:4] + sums[6:]:
+            for key in list(periods):
+                periods[int(key)] = periods.pop(key)
+        for i, (total, saved) in enumerate(zip(self.get_sketches(), prof['sketches'])):
+            for key, state in saved.items():
+                total[int(key) if i < 2 else key] = Sketch.load(state)
+        return prof['offset']
+
+    def save_state(self, prof_name, state_file, offset):
+        """Сохраняет суммы, количества и скетчи до подсчёта вместе со смещением обработанной части файла
 
-    def city_counter(self, sal, amount):
-        """Подсчитывает среднию зарпалту по городам(делит зарплату на количество вакансий в городе)
+        Args:
+            prof_name (str): Название профессии для статистики
+            state_file (str): Файл состояния
+            offset (int): Байтовое смещение конца обработанной части
+        """
+        try:
+            with open(state_file, encoding='utf-8') as file:
+                state = json.load(file)
+            if state['version'] != state_version or state.get('rates') != Rates.get().key:
+                raise ValueError
+        except (OSError, ValueError, KeyError):
+            state = {'version': state_version, 'rates': Rates.get().key, 'profs': {}}
+        state['profs'][prof_name] = {'offset': offset, 'check': self.prefix_hash(self.file_name, offset),
+                                     'sums': self.get_sums(),
+                                     'sketches': [{key: sketch.dump() for key, sketch in sketches.items()}
+                                                  for sketches in self.get_sketches()]}
+        with open(f'{state_file}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False)
+        os.replace(f'{state_file}.tmp', state_file)
+
+    def make_incremental(self, prof_name, state_file=None):
+        """Дополняет сохранённые суммы и количества данными из дописанного в конец файла хвоста
 
         Args:
-            sal (dict): Словарь зарплат
-            amount (dict): Словарь количества зарплат
+            prof_name (str): Название профессии для статистики
+            state_file (str): Файл состояния, по умолчанию - рядом с csv файлом
         """
-        lst = []
-        for key in sal:
-            sal[key] = int(sal[key] / amount[key]) if amount[key] != 0 else 0
-            amount[key] = round(amount[key] / self.vac_amount, 4) if self.vac_amount != 0 else 0
-            if amount[key] < 0.01:
-                lst.append(key)
-        for key in lst:
-            del sal[key]
-            del amount[key]
+        state_file = state_file or f'{self.file_name}.state.json'
+        start = self.load_state(prof_name, state_file)
+        end = self.records_end(self.file_name, start)
+        vacancy = Metrics.timed('Vacancy', Vacancy)
+        for obj in self.CSV_reader(self.file_name, start, end):
+            self.add(vacancy(obj), prof_name)
+        self.save_state(prof_name, state_file, end)
 
-    def make(self, prof_name):
-        """Заполняет и сортирует списки зарплат для статистики по годам и городам
+    @staticmethod
+    def make_chunk(args):
+        """Считает суммы и количества по одной части файла, выполняется в отдельном процессе
+
+        Args:
+            args (tuple): Название файла, название профессии, начало и конец части, включён ли сбор Metrics
+                и таблица курсов валют
+
+        Returns:
+            tuple: Объект DataSet с посчитанными по части файла суммами и количествами
+                и сборщик Metrics процесса (None, если сбор не включён)
+        """
+        f_name, prof_name, start, end, instrument, rates = args
+        Rates.use(rates)
+        metrics = Metrics.start() if instrument else None
+        part = DataSet(f_name, 'stream')
+        vacancy = Metrics.timed('Vacancy', Vacancy)
+        for obj in DataSet.CSV_reader(f_name, start, end):
+            part.add(vacancy(obj), prof_name)
+        Metrics.stop()
+        return part, metrics
+
+    def make_parallel(self, prof_name):
+        """Параллельно считает суммы и количества по частям файла и объединяет их
+
+        Args:
+            prof_name (str): Название профессии для статистики
+        """
+        chunks = self.CSV_chunks(self.file_name, self.processes * 4)
+        metrics = Metrics.active
+        args = [(self.file_name, prof_name, start, end, metrics is not None, Rates.get()) for start, end in chunks]
+        with ProcessPoolExecutor(self.processes) as pool:
+            for part, part_metrics in pool.map(self.make_chunk, args):
+                self.merge(part)
+                if metrics is not None:
+                    metrics.merge(part_metrics)
+
+    @staticmethod
+    def count_partition(f_name, part, prof_name, query):
+        """Считает суммы и количества по одной части файла
 
         Args:
+            f_name (str): Название файла
+            part (dict): Описание части
             prof_name (str): Название профессии для статистики
+            query (Query): Фильтр вакансий
+
+        Returns:
+            tuple: Объект DataSet с посчитанными по части суммами и количествами и словарь месяц -> номер первой
+                подходящей вакансии месяца в исходном файле
         """
-        for vac in self.vacancies_objects:
-            city = vac.area_name
-            year = int(vac.year)
-            if city not in self.sal_by_city:
-                self.sal_by_city[city] = 0
-                self.amount_by_city[city] = 0
-            if year not in self.sal_by_years:
-                self.sal_by_years[year] = 0
-                self.amount_by_years[year] = 0
-                self.sal_by_years_for_prof[year] = 0
-                self.amount_prof_by_years[year] = 0
-            if vac.name.find(prof_name) >= 0:
-                self.sal_by_years_for_prof[year] += vac.salary
-                self.amount_prof_by_years[year] += 1
-
-            self.sal_by_city[city] += vac.salary
-            self.amount_by_city[city] += 1
-            self.sal_by_years[year] += vac.salary
-            self.amount_by_years[year] += 1
+        import numpy as np
+        data_set = DataSet(f_name, 'stream', query=query)
+        columns, rows = data_set.read_partition(part)
+        data_set.add_columns(columns, prof_name)
+        months, codes = columns.group('month')
+        _, first = np.unique(codes, return_index=True)
+        return data_set, dict(zip(months, np.asarray(rows)[first].tolist()))
 
+    @staticmethod
+    def make_partition(args):
+        """Считает суммы и количества по одной части файла, выполняется в отдельном процессе
+
+        Args:
+            args (tuple): Название файла, описание части, название профессии, фильтр, включён ли сбор Metrics
+                и таблица курсов валют
+
+        Returns:
+            tuple: Объект DataSet с посчитанными по части суммами и количествами, номера первых подходящих вакансий
+                месяцев части и сборщик Metrics процесса (None, если сбор не включён)
+        """
+        f_name, part, prof_name, query, instrument, rates = args
+        Rates.use(rates)
+        metrics = Metrics.start() if instrument else None
+        data_set, months = DataSet.count_partition(f_name, part, prof_name, query)
+        Metrics.stop()
+        return data_set, months, metrics
+
+    def make_partitioned(self, prof_name):
+        """Считает суммы и количества по частям файла, оставшимся после отбора по фильтру.
+        Если частей несколько, они обрабатываются параллельно. Результаты частей объединяются в порядке
+        первой подходящей вакансии, поэтому годы идут в том же порядке, что и в других режимах. Месяцы одного года
+        могут быть в разных частях, а части разных лет - перемежаться в файле, поэтому после объединения месяцы
+        переставляются в порядке первой подходящей вакансии месяца
+
+        Args:
+            prof_name (str): Название профессии для статистики
+        """
+        metrics = Metrics.active
+        if len(self.partitions) < 2 or self.processes < 2:
+            results = [self.count_partition(self.file_name, part, prof_name, self.query) + (None,)
+                       for part in self.partitions]
+        else:
+            args = [(self.file_name, part, prof_name, self.query, metrics is not None, Rates.get())
+                    for part in self.partitions]
+            with ProcessPoolExecutor(min(self.processes, len(args))) as pool:
+                results = list(pool.map(self.make_partition, args))
+        firsts = {}
+        for part, months, part_metrics in sorted(results, key=lambda result: min(result[1].values(), default=-1)):
+            self.merge(part)
+            if part_metrics is not None:
+                metrics.merge(part_metrics)
+            for month, first in months.items():
+                firsts[month] = min(first, firsts.get(month, first))
+        order = sorted(firsts, key=firsts.get)
+        for name in ('sal_by_months', 'amount_by_months', 'sal_by_months_for_prof', 'amount_prof_by_months'):
+            values = getattr(self, name)
+            setattr(self, name, {month: values[month] for month in order if month in values})
+
+    @Metrics.stage('count')
+    def count(self):
+        """Переводит накопленные суммы в средние значения и доли, а скетчи - в процентили,
+        сортирует статистику по городам"""
+        self.vac_amount = sum(self.amount_by_city.values())
         self.year_counter(self.sal_by_years, self.amount_by_years)
         self.year_counter(self.sal_by_years_for_prof, self.amount_prof_by_years)
+        self.year_counter(self.sal_by_months, self.amount_by_months)
+        self.year_counter(self.sal_by_months_for_prof, self.amount_prof_by_months)
         self.city_counter(self.sal_by_city, self.amount_by_city)
 
         self.sal_by_city = dict(sorted(self.sal_by_city.items(), key=lambda val: val[1], reverse=True)[:10])
         self.amount_by_city = dict(sorted(self.amount_by_city.items(), key=lambda val: val[1], reverse=True)[:10])
+        self.sal_quantiles_by_city = {city: self.sal_quantiles_by_city[city] for city in self.sal_by_city
+                                      if city in self.sal_quantiles_by_city}
+        self.quantile_counter(self.sal_quantiles_by_years)
+        self.quantile_counter(self.sal_quantiles_by_years_for_prof)
+        self.quantile_counter(self.sal_quantiles_by_city)
+
+    @Metrics.stage('make')
+    def make(self, prof_name):
+        """Заполняет и сортирует списки зарплат для статистики по годам и городам
+
+        Args:
+            prof_name (str): Название профессии для статистики
+        """
+        if self.mode == 'parallel':
+            self.make_parallel(prof_name)
+        elif self.mode == 'incremental':
+            self.make_incremental(prof_name)
+        elif self.mode == 'columns':
+            self.add_columns(self.columns, prof_name)
+        elif self.mode == 'cube':
+            self.make_cube(prof_name)
+        elif self.mode == 'partitioned':
+            self.make_partitioned(prof_name)
+        else:
+            for vac in self.get_vacancies():
+                self.add(vac, prof_name)
+        self.count()
 
 
 class Table:
@@ -287,7 +2883,7 @@ class Table:
 
     Attributes:
         f_name (str): Название файла
-        filter (str): Параметр фильтрации
+        filter (Query): Фильтр вакансий или 'nothing', если фильтр не задан
         sort_type (str): Параметр сортировки
         is_rev_sort (str): Обратный порядок сортировки (Да / Нет)
         boarders (str): Диапазон вывода
@@ -296,28 +2892,66 @@ class Table:
         titles (list): Список названий
     """
 
-    def __init__(self, f_name):
+    def __init__(self, f_name, index=False, query=None, data_set=None, mode='list'):
         """Инициализирует объект Table
 
         Args:
             f_name (str): Название файла
+            index (bool): Строить ли индексы для фильтрации
+            query (tuple): Параметры фильтрации, сортировки, порядка сортировки, диапазона и столбцов,
+                если не заданы - запрашиваются у пользователя
+            data_set (DataSet): Уже загруженные вакансии в режиме 'list' или 'mmap', если не заданы - файл читается
+                заново
+            mode (str): Режим загрузки файла ('list', 'mmap' или 'partitioned'). В режиме 'mmap' разбираются только
+                выводимые вакансии, если их не нужно сортировать или фильтровать без индекса. В режиме 'partitioned'
+                читаются только части файла, которые могут содержать подходящие под фильтр вакансии
         """
         self.f_name = f_name
-        self.filter = input('Введите параметр фильтрации: ')
-        self.sort_type = input('Введите параметр сортировки: ')
-        self.is_rev_sort = input('Обратный порядок сортировки (Да / Нет): ')
-        self.boarders = input('Введите диапазон вывода: ')
-        self.need_titles = input('Введите требуемые столбцы: ')
+        if query is None:
+            query = (input('Введите параметр фильтрации: '),
+                     input('Введите параметр сортировки: '),
+                     input('Обратный порядок сортировки (Да / Нет): '),
+                     input('Введите диапазон вывода: '),
+                     input('Введите требуемые столбцы: '))
+        self.filter, self.sort_type, self.is_rev_sort, self.boarders, self.need_titles = query
         self.filter = self.param_fixer(self.filter, 'param')
         self.sort_type = self.param_fixer(self.sort_type, 'sort')
         self.is_rev_sort = self.param_fixer(self.is_rev_sort, 'rev')
 
-        self.vacancies = DataSet(self.f_name)
+        if data_set is None:
+            data_set = DataSet(self.f_name, mode, query=None if self.filter == 'nothing' else self.filter)
+            if mode == 'partitioned':
+                data_set.vacancies_objects = data_set.get_vacancies()
+        self.vacancies = data_set
+        if index:
+            self.vacancies.make_index()
         self.titles = translation
 
         self.boarders = self.boarders.split() if self.boarders else '0'
         self.need_titles = self.need_titles.split(', ') if self.need_titles else 'all'
 
+    @staticmethod
+    def param_error(p, type):
+        """Проверяет корректность ввода данных пользователем
+
+        Args:
+            p (str): Ввод пользователя
+            type (str): Параметр проверки
+
+        Returns:
+            str: Сообщение об ошибке или None, если ввод корректен
+        """
+        if type == 'param' and p:
+            try:
+                Query(p)
+            except ValueError as error:
+                return str(error)
+        if type == 'sort' and p and p not in translation:
+            return 'Параметр сортировки некорректен'
+        if type == 'rev' and p not in ['Да', 'Нет', '']:
+            return 'Порядок сортировки задан некорректно'
+        return None
+
     @staticmethod
     def param_fixer(p, type):
         """Служит для проверки корректности ввода данных пользователем
@@ -329,87 +2963,363 @@ class Table:
         Returns:
             p (str): Ввод пользователя после проверки корректности
         """
+        error = Table.param_error(p, type)
+        if error:
+            print(error)
+            quit()
+        if type in ('param', 'sort') and not p:
+            return 'nothing'
         if type == 'param':
-            if not p:
-                return 'nothing'
-            if ':' not in p:
-                print('Формат ввода некорректен')
-                quit()
-            p = p.split(': ')
-            if p[0] not in translation and p[0] != 'Идентификатор валюты оклада':
-                print('Параметр поиска некорректен')
-                quit()
-        if type == 'sort':
-            if not p:
-                return 'nothing'
-            if p not in translation:
-                print('Параметр сортировки некорректен')
-                quit()
-        if type == 'rev':
-            if p not in ['Да', 'Нет', '']:
-                print('Порядок сортировки задан некорректно')
-                quit()
+            p = Query(p)
         return p
 
-    def get_filtered(self, vac):
-        """Производит фильтрацию вакансии
-
-        Args:
-            vac (Vacancy): Вакансия
+    @Metrics.stage('filter')
+    def get_filtered(self):
+        """Производит фильтрацию вакансий, используя индексы DataSet, если они построены
 
         Returns:
-            vac (Vacancy): Отфильтрованная вакансия
+            list: Отфильтрованные вакансии в исходном порядке
         """
+        vacancies = self.vacancies.vacancies_objects
         if self.filter == 'nothing':
-            return vac
-        return functions[self.filter[0]](vac, self.filter[1])
+            return vacancies
+        return self.filter.filter(vacancies, self.vacancies.index)
+
+    @Metrics.stage('sort')
+    def sort_vac(self, vacancies, limit=None):
+        """Производит сортировку вакансий. Если нужны только первые limit вакансий,
+        они выбираются через кучу без сортировки всего списка, а самые ранние или поздние из всех вакансий -
+        по индексу дат публикации, если он построен
 
-    def sort_vac(self):
-        """Производит сортировку вакансий
+        Args:
+            vacancies (list): Вакансии
+            limit (int): Количество первых вакансий, которые нужно вернуть
 
         Returns:
-            vacancies_objects : Отсторитрованные вакансии
+            vacancies : Отсторитрованные вакансии
         """
         if self.sort_type == 'nothing':
-            return self.vacancies.vacancies_objects
+            return vacancies[:limit]
         is_reverse = True if self.is_rev_sort == 'Да' else False
-        sorts[self.sort_type](self.vacancies.vacancies_objects, is_reverse)
-        return self.vacancies.vacancies_objects
-
-    def print_table(self):
-        """Печатает таблицу со статистикой"""
-        table = PrettyTable()
-        titles = self.titles.copy()
-        titles.insert(0, '№')
-        table.field_names = titles
+        index = self.vacancies.index
+        if self.sort_type == 'Дата публикации вакансии' and self.filter == 'nothing' and index and limit is not None:
+            return [self.vacancies.vacancies_objects[i] for i in islice(index.by_time(is_reverse), limit)]
+        key = sort_keys[self.sort_type]
+        if limit is not None and limit < len(vacancies):
+            return (heapq.nlargest if is_reverse else heapq.nsmallest)(limit, vacancies, key=key)
+        return sorted(vacancies, key=key, reverse=is_reverse)
+
+    def get_range(self):
+        """Переводит введённый диапазон вывода в индексы
+
+        Returns:
+            tuple: Начало и конец диапазона, конец равен None, если диапазон не ограничен
+        """
+        start = int(self.boarders[0]) - 1 if int(self.boarders[0]) != 0 else 0
+        if len(self.boarders) == 1:
+            return start, None
+        return start, int(self.boarders[1]) - 1 if int(self.boarders[1]) != 0 else 0
+
+    def get_fields(self):
+        """Возвращает выводимые столбцы в порядке столбцов таблицы
+
+        Returns:
+            list: Названия столбцов, первый из них - номер строки
+        """
+        if self.need_titles == 'all':
+            return ['№'] + self.titles
+        return ['№'] + [title for title in self.titles if title in self.need_titles]
+
+    @staticmethod
+    def make_table(fields):
+        """Создаёт пустую таблицу с заданными столбцами
+
+        Args:
+            fields (list): Названия столбцов
+
+        Returns:
+            PrettyTable: Таблица
+        """
+        import prettytable
+        table = prettytable.PrettyTable()
+        table.field_names = fields
         table.max_width = 20
         table.hrules = prettytable.ALL
         table.align = "l"
+        return table
 
-        if len(self.boarders) == 1:
-            start = int(self.boarders[0]) - 1 if int(self.boarders[0]) != 0 else 0
-            end = len(self.vacancies.vacancies_objects)
-        else:
-            start = int(self.boarders[0]) - 1 if int(self.boarders[0]) != 0 else 0
-            end = int(self.boarders[1]) - 1 if int(self.boarders[1]) != 0 else 0
-        if self.need_titles == 'all':
-            self.need_titles = titles
-        self.need_titles.insert(0, '№')
-        i = 0
-        for vac in self.sort_vac():
-            row = vac.__str__()
-            if not self.get_filtered(vac):
-                continue
-            for r in range(len(row)):
-                if len(row[r]) > 100:
-                    row[r] = f"{row[r][:100]}..."
-            row.insert(0, i + 1)
-            table.add_row(row)
-            i += 1
-        if i == 0:
+    @staticmethod
+    def get_row(vac, number, fields):
+        """Форматирует только выводимые значения вакансии, обрезая их до 100 символов
+
+        Args:
+            vac (Vacancy): Вакансия
+            number (int): Номер строки
+            fields (list): Названия столбцов, первый из них - номер строки
+
+        Returns:
+            list: Строка таблицы
+        """
+        row = [number]
+        for title in fields[1:]:
+            value = formats[title](vac)
+            row.append(f"{value[:100]}..." if len(value) > 100 else value)
+        return row
+
+    def pages(self, page_size=None):
+        """Форматирует таблицу постранично: в каждую страницу попадают только вакансии из диапазона вывода
+        и только выводимые столбцы
+
+        Args:
+            page_size (int): Количество строк на странице, по умолчанию - весь диапазон на одной странице
+
+        Yields:
+            str: Страница таблицы
+        """
+        start, end = self.get_range()
+        filtered = self.get_filtered()
+        if not filtered:
+            return
+        vacancies = self.sort_vac(filtered, end)
+        end = len(vacancies) if end is None else min(end, len(vacancies))
+        fields = self.get_fields()
+        page_size = page_size or max(end - start, 1)
+        for page_start in range(start, end, page_size) or [start]:
+            table = self.make_table(fields)
+            for i in range(page_start, min(page_start + page_size, end)):
+                table.add_row(self.get_row(vacancies[i], i + 1, fields))
+            yield table.get_string()
+
+    def save_excel(self, path, sample=1000):
+        """Записывает все отфильтрованные и отсортированные вакансии из диапазона вывода в excel файл,
+        значения не обрезаются
+
+        Args:
+            path (str): Путь к файлу
+            sample (int): Количество первых строк, по которым считается ширина столбцов
+        """
+        start, end = self.get_range()
+        fields = self.get_fields()
+        vacancies = self.sort_vac(self.get_filtered(), end)
+        rows = ([i + 1] + [formats[title](vac) for title in fields[1:]]
+                for i, vac in enumerate(vacancies[start:end], start))
+        excel = Excel()
+        excel.add_sheet('Вакансии', chain([fields], rows), sample=sample)
+        excel.save(path)
+
+    def print_table(self, page_size=None):
+        """Печатает таблицу со статистикой
+
+        Args:
+            page_size (int): Количество строк на странице, по умолчанию вся таблица печатается одной страницей
+        """
+        found = False
+        for page in self.pages(page_size):
+            print(page)
+            found = True
+        if not found:
             print('Ничего не найдено')
+
+
+class Excel:
+    """Класс для потоковой записи excel файлов. Листы создаются в режиме write-only: строки сразу уходят в файл
+    и не хранятся в памяти. Такой лист должен знать ширину столбцов до записи первой строки, поэтому ширина
+    считается по максимальной длине значений в первых строках листа
+
+    Attributes:
+        workbook : WB для работы с excel в режиме write-only
+        font (Font): Шрифт заголовков
+        border (Border): Граница ячеек
+    """
+
+    def __init__(self):
+        """Инициализирует объект Excel"""
+        import openpyxl
+        from openpyxl.styles import Font, Border, Side
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.font = Font(bold=True)
+        sd = Side(border_style='thin', color='FF000000')
+        self.border = Border(left=sd, right=sd, top=sd, bottom=sd)
+
+    def add_sheet(self, title, rows, formats=None, widths=None, sample=1000, max_width=100):
+        """Записывает лист. Первая строка - заголовки, пустые значения (None) остаются без границ
+
+        Args:
+            title (str): Название листа
+            rows: Итератор строк (списков значений)
+            formats (dict): Числовые форматы по номеру столбца
+            widths (dict): Заданная ширина по номеру столбца
+            sample (int): Количество первых строк, по которым считается ширина столбцов
+            max_width (int): Наибольшая ширина столбца
+        """
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+        ws = self.workbook.create_sheet(title)
+        rows = iter(rows)
+        head = list(islice(rows, sample))
+        dims = {}
+        for row in head:
+            for i, value in enumerate(row):
+                if value:
+                    dims[i] = max(dims.get(i, 0), len(str(value)) + 2)
+        dims.update(widths or {})
+        for i, width in dims.items():
+            ws.column_dimensions[get_column_letter(i + 1)].width = min(width, max_width)
+        formats = formats or {}
+        for n, row in enumerate(chain(head, rows)):
+            cells = []
+            for i, value in enumerate(row):
+                if value is None:
+                    cells.append(None)
+                    continue
+                cell = WriteOnlyCell(ws, value=value)
+                cell.border = self.border
+                if n == 0:
+                    cell.font = self.font
+                elif i in formats:
+                    cell.number_format = formats[i]
+                cells.append(cell)
+            ws.append(cells)
+
+    def save(self, path):
+        """Сохраняет файл
+
+        Args:
+            path (str): Путь к файлу
+        """
+        self.workbook.save(path)
+
+
+def wkhtmltopdf_backend(html, path):
+    """Создаёт pdf файл внешней программой wkhtmltopdf (новый процесс на каждый файл).
+    Путь к программе берётся из переменной окружения WKHTMLTOPDF или ищется в PATH
+
+    Args:
+        html (str): Готовая HTML страница
+        path (str): Путь к pdf файлу
+    """
+    import pdfkit
+    binary = os.environ.get('WKHTMLTOPDF') or shutil.which('wkhtmltopdf') or r'D:\wkhtmltopdf\bin\wkhtmltopdf.exe'
+    options = {
+        'enable-local-file-access': None
+    }
+    config = pdfkit.configuration(wkhtmltopdf=binary)
+    pdfkit.from_string(html, path, configuration=config, options=options)
+
+
+def weasyprint_backend(html, path):
+    """Создаёт pdf файл внутри текущего процесса через WeasyPrint (необязательная зависимость)
+
+    Args:
+        html (str): Готовая HTML страница
+        path (str): Путь к pdf файлу
+    """
+    import weasyprint
+    weasyprint.HTML(string=html).write_pdf(path)
+
+
+pdf_backends = {
+    'wkhtmltopdf': wkhtmltopdf_backend,
+    'weasyprint': weasyprint_backend
+}
+external_backends = ('wkhtmltopdf',)
+
+
+def render_pdf(backend, html, path):
+    """Создаёт pdf файл способом из pdf_backends, выполняется и в постоянном процессе-обработчике:
+    в процесс передаётся название способа, а не функция, поэтому способ должен быть добавлен в pdf_backends
+    при импорте модуля
+
+    Args:
+        backend (str): Способ создания pdf файлов
+        html (str): Готовая HTML страница
+        path (str): Путь к pdf файлу
+    """
+    pdf_backends[backend](html, path)
+
+
+class PdfRenderer:
+    """Класс для генерации pdf файлов. Шаблон компилируется один раз и используется для всех отчётов.
+    Файлы создаются выбранным способом из pdf_backends в текущем процессе или в одном постоянном
+    процессе-обработчике, который запускается один раз и обрабатывает все файлы. Постоянный процесс имеет смысл
+    только для способов, создающих файлы внутри процесса (weasyprint): он один раз загружает библиотеку
+    и шрифты. Способы из external_backends запускают внешнюю программу на каждый файл, для них он не создаётся
+
+    Attributes:
+        backend (str): Способ создания pdf файлов из pdf_backends
+        template: Скомпилированный шаблон jinja2
+        pool (ProcessPoolExecutor): Постоянный процесс-обработчик, если используется
+    """
+    environments = {}
+    instances = {}
+
+    def __init__(self, backend='wkhtmltopdf', template='main.html', folder='.', persistent=False):
+        """Инициализирует объект PdfRenderer
+
+        Args:
+            backend (str): Способ создания pdf файлов из pdf_backends
+            template (str): Название шаблона
+            folder (str): Папка с шаблонами
+            persistent (bool): Создавать ли файлы в постоянном процессе-обработчике
+
+        Raises:
+            ValueError: Если постоянный процесс запрошен для способа из external_backends
+        """
+        if persistent and backend in external_backends:
+            raise ValueError(f'Способ {backend} запускает отдельную программу для каждого файла, '
+                             f'постоянный процесс-обработчик для него не нужен')
+        self.backend = backend
+        self.template = self.get_template(folder, template)
+        self.pool = ProcessPoolExecutor(1) if persistent else None
+
+    @staticmethod
+    def get_template(folder, name):
+        """Возвращает скомпилированный шаблон. Окружение jinja2 создаётся одно на папку,
+        шаблоны компилируются при первом обращении и больше не перечитываются с диска
+
+        Args:
+            folder (str): Папка с шаблонами
+            name (str): Название шаблона
+
+        Returns:
+            Скомпилированный шаблон
+        """
+        from jinja2 import Environment, FileSystemLoader
+        if folder not in PdfRenderer.environments:
+            PdfRenderer.environments[folder] = Environment(loader=FileSystemLoader(folder), auto_reload=False)
+        return PdfRenderer.environments[folder].get_template(name)
+
+    @staticmethod
+    def default():
+        """Возвращает общий для всех отчётов генератор. Способ создания файлов берётся из переменной
+        окружения PDF_BACKEND (по умолчанию wkhtmltopdf), для weasyprint файлы создаются в текущем процессе
+
+        Returns:
+            PdfRenderer: Генератор pdf файлов
+        """
+        backend = os.environ.get('PDF_BACKEND', 'wkhtmltopdf')
+        if backend not in PdfRenderer.instances:
+            PdfRenderer.instances[backend] = PdfRenderer(backend)
+        return PdfRenderer.instances[backend]
+
+    def render(self, context, path):
+        """Заполняет шаблон и создаёт pdf файл
+
+        Args:
+            context (dict): Данные для шаблона
+            path (str): Путь к pdf файлу
+        """
+        html = self.template.render(context)
+        if self.pool is None:
+            render_pdf(self.backend, html, path)
         else:
-            print(table.get_string(start=start, end=end, fields=self.need_titles))
+            self.pool.submit(render_pdf, self.backend, html, path).result()
+
+    def close(self):
+        """Останавливает процесс-обработчик"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
 
 
 class Report:
@@ -419,25 +3329,107 @@ class Report:
         f_name (str): Название файла
         prof_name (str): Название профессии
         data_set (DataSet): Данные
+        folder (str): Папка для готовых файлов
+        renderer (PdfRenderer): Генератор pdf файлов, если не задан - используется общий PdfRenderer.default()
         workbook : WB для работы с excel
         years (list): Года с собранных данных
         fig, ax : Для генерации графиков
     """
 
-    def __init__(self, f_name, prof_name):
+    def __init__(self, f_name, prof_name, mode='columns', data_set=None, folder='.', renderer=None, query=None):
         """Инициализирует объект Report
 
         Args:
             f_name (str): Название файла
             prof_name (str): Название профессии
+            mode (str): Режим загрузки данных ('columns', 'stream', 'parallel', 'incremental', 'cube' или 'partitioned')
+            data_set (DataSet): Уже посчитанные данные, если не указаны - файл читается заново
+            folder (str): Папка для готовых файлов
+            renderer (PdfRenderer): Генератор pdf файлов
+            query: Фильтр вакансий (Query или его текст) для режима 'partitioned'
         """
         self.f_name = f_name
         self.prof_name = prof_name
-        self.data_set = DataSet(self.f_name)
-        self.data_set.make(self.prof_name)
-        self.workbook = openpyxl.Workbook()
+        if data_set is None:
+            data_set = DataSet(self.f_name, mode, query=query)
+            data_set.make(self.prof_name)
+        self.data_set = data_set
+        self.folder = folder
+        self.renderer = renderer
+        self.workbook = None
         self.years = [x for x in self.data_set.sal_by_years]
-        self.fig, self.ax = plt.subplots(nrows=2, ncols=2)
+        self.fig, self.ax = None, None
+
+    @staticmethod
+    def batch(f_name, prof_names, mode='columns', folder='.', renderer=None):
+        """Создаёт отчёты для нескольких профессий, читая и обрабатывая файл один раз
+
+        Args:
+            f_name (str): Название файла
+            prof_names (list): Названия профессий
+            mode (str): Режим загрузки данных ('columns', 'stream' или 'list')
+            folder (str): Папка, в которой для каждой профессии создаётся своя папка с файлами
+            renderer (PdfRenderer): Генератор pdf файлов, общий для всех отчётов
+
+        Returns:
+            list: Объекты Report для каждой профессии
+        """
+        data_sets = DataSet(f_name, mode).make_batch(prof_names)
+        return [Report(f_name, prof_name, data_set=data_sets[prof_name], folder=os.path.join(folder, prof_name),
+                       renderer=renderer) for prof_name in prof_names]
+
+    def get_path(self, name):
+        """Возвращает путь к готовому файлу
+
+        Args:
+            name (str): Название файла
+
+        Returns:
+            str: Путь к файлу в папке отчёта
+        """
+        return os.path.join(self.folder, name)
+
+    def generate_all(self):
+        """Генерирует png, excel и pdf файлы параллельно. pdf создаётся после png, так как включает в себя график"""
+        os.makedirs(self.folder, exist_ok=True)
+        with ThreadPoolExecutor(2) as pool:
+            excel = pool.submit(self.generate_excel)
+            self.generate_image()
+            pdf = pool.submit(self.generate_pdf)
+            excel.result()
+            pdf.result()
+
+    def detached(self):
+        """Возвращает копию отчёта для передачи в другой процесс: без генератора pdf и графиков, а из данных
+        остаются только посчитанные статистики, без вакансий, колоночного хранилища, индексов и куба,
+        которые могут быть отображены в память и не передаются между процессами
+
+        Returns:
+            Report: Копия отчёта
+        """
+        report = copy.copy(self)
+        report.renderer = None
+        report.workbook = None
+        report.fig, report.ax = None, None
+        report.data_set = copy.copy(self.data_set)
+        report.data_set.vacancies_objects = []
+        report.data_set.columns = None
+        report.data_set.index = None
+        report.data_set.cube = None
+        return report
+
+    @staticmethod
+    def generate_batch(reports, processes=None):
+        """Генерирует файлы нескольких отчётов в пуле процессов. В процессы передаются копии отчётов из detached,
+        каждый процесс использует свой PdfRenderer.default(), сами отчёты не изменяются
+
+        Args:
+            reports (list): Объекты Report
+            processes (int): Количество процессов, по умолчанию - количество ядер
+        """
+        with ProcessPoolExecutor(processes) as pool:
+            for _ in pool.map(Report.generate_all, [report.detached() for report in reports]):
+                pass
 
     def print_data(self):
         """Выводит данны по годам и городам в консоль"""
@@ -448,23 +3440,30 @@ class Report:
               self.data_set.amount_prof_by_years)
         print('Уровень зарплат по городам (в порядке убывания):', self.data_set.sal_by_city)
         print('Доля вакансий по городам (в порядке убывания):', self.data_set.amount_by_city)
+        print('10-й процентиль, медиана и 90-й процентиль зарплат по годам:', self.data_set.sal_quantiles_by_years)
+        print('10-й процентиль, медиана и 90-й процентиль зарплат по годам для выбранной профессии:',
+              self.data_set.sal_quantiles_by_years_for_prof)
+        print('10-й процентиль, медиана и 90-й процентиль зарплат по городам:', self.data_set.sal_quantiles_by_city)
 
+    @Metrics.stage('generate_pdf')
     def generate_pdf(self):
         """Генерирует pdf файл"""
         headers1, headers2, headers3, t1_data, t2_data, t3_data = self.make_data()
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("main.html")
-        pdf_template = template.render(
+        renderer = self.renderer or PdfRenderer.default()
+        image = Path(self.get_path('graph.png')).resolve().as_uri()
+        style = Path('style.css').resolve().as_uri()
+        renderer.render(
             {'prof': self.prof_name, 'table1Headers': headers1, 'table1Data': t1_data, 'table2Headers': headers2,
-             'table2Data': t2_data, 'table3Headers': headers3, 'table3Data': t3_data})
-        options = {
-            'enable-local-file-access': None
-        }
-        config = pdfkit.configuration(wkhtmltopdf=r'D:\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report.pdf', configuration=config, options=options)
+             'table2Data': t2_data, 'table3Headers': headers3, 'table3Data': t3_data, 'image': image, 'style': style},
+            self.get_path('report.pdf'))
 
+    @Metrics.stage('generate_image')
     def generate_image(self):
-        """Генерирует png файл"""
+        """Генерирует png файл без вывода на экран, график строится через Figure без pyplot и GUI"""
+        from matplotlib.figure import Figure
+        import numpy as np
+        self.fig = Figure()
+        self.ax = self.fig.subplots(nrows=2, ncols=2)
         labels = self.years
         sal = [x for x in self.data_set.sal_by_years.values()]
         job_sal = [x for x in self.data_set.sal_by_years_for_prof.values()]
@@ -507,60 +3506,25 @@ class Report:
         self.ax[1, 0].grid(axis='x')
         self.ax[1, 0].invert_yaxis()
         self.fig.tight_layout()
-        plt.show()
-        self.fig.savefig('graph.png')
+        self.fig.savefig(self.get_path('graph.png'))
 
+    @Metrics.stage('generate_excel')
     def generate_excel(self):
-        """Генерирует excel файл"""
-        ws1 = self.workbook.active
-        ws1.title = 'Статистика по годам'
-        ws2 = self.workbook.create_sheet('Статистика по городам')
-
-        f = Font(bold=True)
-        sd = Side(border_style='thin', color='FF000000')
-        b = Border(left=sd, right=sd, top=sd, bottom=sd)
-
-        ws1['A1'] = 'Год'
-        ws1['B1'] = 'Средняя зарплата'
-        ws1['C1'] = 'Количество вакансий'
-        ws1['D1'] = f'Средняя зарплата - {self.prof_name}'
-        ws1['E1'] = f'Количество вакансий - {self.prof_name}'
-
-        ws2['A1'] = ws2['D1'] = 'Город'
-        ws2['B1'] = 'Уровень зарплат'
-        ws2['E1'] = 'Доля вакансий'
-
-        self.create_values(self.data_set.sal_by_years, ws1, 'A')
-        self.create_values(self.data_set.sal_by_years.values(), ws1, 'B')
-        self.create_values(self.data_set.amount_by_years.values(), ws1, 'C')
-        self.create_values(self.data_set.sal_by_years_for_prof.values(), ws1, 'D')
-        self.create_values(self.data_set.amount_prof_by_years.values(), ws1, 'E')
-        self.create_values(self.data_set.sal_by_city, ws2, 'A')
-        self.create_values(self.data_set.sal_by_city.values(), ws2, 'B')
-        self.create_values(self.data_set.amount_by_city, ws2, 'D')
-        self.create_values(self.data_set.amount_by_city.values(), ws2, 'E')
-
-        row1 = ws1['1']
-        row1_2 = ws2['1']
-        col_e = ws2['E2':'E11']
-        for r in row1:
-            r.font = f
-        for r in row1_2:
-            r.font = f
-        for r in col_e:
-            for s in r:
-                s.number_format = '0.00%'
-        for r in ws1:
-            for s in r:
-                s.border = b
-        for r in ws2:
-            for s in r:
-                if s.value:
-                    s.border = b
-        self.correct_rows(ws1)
-        self.correct_rows(ws2)
-        ws2.column_dimensions['C'].width = 2
-        self.workbook.save('rep.xlsx')
+        """Генерирует excel файл, строки записываются сразу в файл через write-only листы"""
+        excel = Excel()
+        years = [['Год', 'Средняя зарплата', 'Количество вакансий', f'Средняя зарплата - {self.prof_name}',
+                  f'Количество вакансий - {self.prof_name}']]
+        for year in self.data_set.sal_by_years:
+            years.append([year, self.data_set.sal_by_years[year], self.data_set.amount_by_years[year],
+                          self.data_set.sal_by_years_for_prof[year], self.data_set.amount_prof_by_years[year]])
+        cities = [['Город', 'Уровень зарплат', None, 'Город', 'Доля вакансий']]
+        for sal, amount in zip_longest(self.data_set.sal_by_city.items(), self.data_set.amount_by_city.items(),
+                                       fillvalue=(None, None)):
+            cities.append([sal[0], sal[1], None, amount[0], amount[1]])
+        excel.add_sheet('Статистика по годам', years)
+        excel.add_sheet('Статистика по городам', cities, formats={4: '0.00%'}, widths={2: 2})
+        excel.save(self.get_path('rep.xlsx'))
+        self.workbook = excel.workbook
 
     def make_data(self):
         """Создает данные для создания pdf файла и связи с HTML(при помози jinja2)"""
@@ -598,33 +3562,175 @@ class Report:
         str = str.replace(' ', '\n')
         return str
 
-    @staticmethod
-    def correct_rows(ws):
-        """Служит для коррекции ширины столбцов для excel таблицы
+
+class Server:
+    """Класс для локального сервиса запросов. Файл загружается один раз и остаётся в памяти, таблицы и статистика
+    считаются по уже загруженным данным, а готовые ответы хранятся в LRU кэше по нормализованному запросу
+
+    Attributes:
+        f_name (str): Название файла
+        cache_size (int): Наибольшее количество ответов в кэше
+        stat (tuple): Размер и время изменения файла на момент загрузки
+        columns (Columns): Колоночное хранилище вакансий для статистики
+        vacancies (DataSet): Вакансии в режиме 'list' с индексами для таблиц
+        results (OrderedDict): Кэш ответов, в конце - последние использованные
+    """
+    params = ('filter', 'sort', 'reverse', 'range', 'columns')
+
+    def __init__(self, f_name, cache_size=128):
+        """Инициализирует объект Server и загружает файл
 
         Args:
-            ws: Рабочий лист в excel
+            f_name (str): Название файла
+            cache_size (int): Наибольшее количество ответов в кэше
         """
-        dims = {}
-        for row in ws.rows:
-            for cell in row:
-                if cell.value:
-                    dims[cell.column_letter] = max((dims.get(cell.column_letter, 0), len(str(cell.value)) + 2))
-        for col, value in dims.items():
-            ws.column_dimensions[col].width = value
+        self.f_name = f_name
+        self.cache_size = cache_size
+        self.results = OrderedDict()
+        self.load()
+
+    def load(self):
+        """Загружает файл, строит индексы для таблиц и очищает кэш ответов"""
+        stat = os.stat(self.f_name)
+        self.stat = (stat.st_size, stat.st_mtime_ns)
+        self.columns = DataSet.load_columns(self.f_name)
+        self.vacancies = DataSet(self.f_name, columns=self.columns)
+        self.vacancies.make_index()
+        self.results.clear()
+
+    def refresh(self):
+        """Перезагружает файл, если он изменился после загрузки"""
+        stat = os.stat(self.f_name)
+        if (stat.st_size, stat.st_mtime_ns) != self.stat:
+            self.load()
+
+    def cached(self, key, compute):
+        """Возвращает ответ из кэша, либо считает его и сохраняет в кэш, вытесняя самый давно использованный
 
-    @staticmethod
-    def create_values(val, cell, letter):
-        """Служит для заполнения значений в excel
+        Args:
+            key (tuple): Нормализованный запрос
+            compute: Функция без аргументов, которая считает ответ
+
+        Returns:
+            Ответ на запрос
+        """
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+        result = compute()
+        self.results[key] = result
+        if len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+        return result
+
+    def table(self, query):
+        """Возвращает таблицу вакансий так же, как её печатает Table
+
+        Args:
+            query (tuple): Параметры фильтрации, сортировки, порядка сортировки, диапазона и столбцов
+
+        Returns:
+            str: Таблица или сообщение, что ничего не найдено
+
+        Raises:
+            ValueError: Если параметры запроса некорректны
+        """
+        for p, type in zip(query, ('param', 'sort', 'rev')):
+            error = Table.param_error(p, type)
+            if error:
+                raise ValueError(error)
+        table = Table(self.f_name, query=query, data_set=self.vacancies)
+        try:
+            borders = table.get_range()
+        except (ValueError, IndexError):
+            raise ValueError('Диапазон вывода задан некорректно')
+        key = ('table', None if table.filter == 'nothing' else table.filter.key(), table.sort_type,
+               table.is_rev_sort == 'Да', borders, tuple(table.get_fields()))
+        return self.cached(key, lambda: '\n'.join(table.pages()) or 'Ничего не найдено')
+
+    def make_stats(self, prof_name):
+        """Считает статистику по загруженному файлу
+
+        Args:
+            prof_name (str): Название профессии
+
+        Returns:
+            dict: Статистика в том же порядке, что и в Report.print_data
+        """
+        data_set = DataSet(self.f_name, 'columns', columns=self.columns)
+        data_set.make(prof_name)
+        return {'sal_by_years': data_set.sal_by_years, 'amount_by_years': data_set.amount_by_years,
+                'sal_by_years_for_prof': data_set.sal_by_years_for_prof,
+                'amount_prof_by_years': data_set.amount_prof_by_years,
+                'sal_by_city': data_set.sal_by_city, 'amount_by_city': data_set.amount_by_city,
+                'sal_by_months': data_set.sal_by_months, 'amount_by_months': data_set.amount_by_months,
+                'sal_by_months_for_prof': data_set.sal_by_months_for_prof,
+                'amount_prof_by_months': data_set.amount_prof_by_months,
+                'sal_quantiles_by_years': data_set.sal_quantiles_by_years,
+                'sal_quantiles_by_years_for_prof': data_set.sal_quantiles_by_years_for_prof,
+                'sal_quantiles_by_city': data_set.sal_quantiles_by_city}
+
+    def stats(self, prof_name):
+        """Возвращает статистику для профессии
+
+        Args:
+            prof_name (str): Название профессии
+
+        Returns:
+            dict: Статистика по годам и городам
+        """
+        prof_name = prof_name.strip()
+        return self.cached(('stats', prof_name), lambda: self.make_stats(prof_name))
+
+    def handle(self, path):
+        """Отвечает на запрос /table?filter=&sort=&reverse=&range=&columns= или /stats?prof=
 
         Args:
-            val: Значения
-            cell: рабочий лист
-            letter (str): бувка клетки (A1)
+            path (str): Путь запроса с параметрами
+
+        Returns:
+            tuple: Код ответа, тип содержимого и текст ответа
+        """
+        url = urlparse(path)
+        params = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        self.refresh()
+        try:
+            if url.path == '/table':
+                return 200, 'text/plain', self.table(tuple(params.get(key, '') for key in self.params))
+            if url.path == '/stats':
+                return 200, 'application/json', json.dumps(self.stats(params.get('prof', '')), ensure_ascii=False)
+        except ValueError as error:
+            return 400, 'text/plain', str(error)
+        return 404, 'text/plain', 'Запрос не найден'
+
+    def serve(self, host='127.0.0.1', port=8000):
+        """Запускает HTTP сервер и отвечает на запросы до прерывания
+
+        Args:
+            host (str): Адрес сервера
+            port (int): Порт сервера
         """
-        for i, year in enumerate(val, start=2):
-            n = f'{letter}{i}'
-            cell[n] = year
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Обработчик GET запросов, передающий их объекту Server"""
+
+            def do_GET(self):
+                """Отправляет ответ на GET запрос"""
+                code, content_type, text = server.handle(self.path)
+                body = text.encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        with HTTPServer((host, port), Handler) as http_server:
+            try:
+                http_server.serve_forever()
+            except KeyboardInterrupt:
+                pass
 
 
 class Input:
@@ -636,22 +3742,40 @@ class Input:
         prof_name (str): Название профессии
         report (Report): объект класса Report
         table (Table): объект класса Table
+        server (Server): объект класса Server
     """
 
     def __init__(self):
-        """Инициализирует объект Input, проверяет какую информацию будет выводить программа"""
+        """Инициализирует объект Input, проверяет какую информацию будет выводить программа.
+        Если задана переменная окружения STATISTICS_METRICS, время этапов и счётчики строк сохраняются
+        в указанный в ней json файл"""
         self.request = input('Вывести вакансии или статистику?')
         # self.f_name = input('Введите название файла: ')
         self.f_name = 'vacancies_big.csv'
+        metrics_file = os.environ.get('STATISTICS_METRICS')
+        if metrics_file:
+            Metrics.start()
+        try:
+            self.run()
+        finally:
+            if metrics_file:
+                Metrics.stop().save(metrics_file)
+
+    def run(self):
+        """Выводит запрошенную информацию"""
         if self.request.casefold()[:4] == 'стат':
             # self.prof_name = input('Введите название профессии: ')
             self.prof_name = 'Программист'
             self.report = Report(self.f_name, self.prof_name)
             self.report.generate_pdf()
             self.report.print_data()
+        elif self.request.casefold()[:4] == 'серв':
+            self.server = Server(self.f_name)
+            self.server.serve()
         else:
-            self.table = Table(self.f_name)
+            self.table = Table(self.f_name, mode='mmap')
             self.table.print_table()
 
 
-x = Input()
+if __name__ == '__main__':
+    x = Input()